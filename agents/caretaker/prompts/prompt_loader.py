@@ -1,9 +1,11 @@
 from pathlib import Path
 
+from agents.common.prompt_registry import load_prompt
+
 BASE_DIR = Path(__file__).parent
 
 def load_system_prompt():
-    return (BASE_DIR / "system_prompt.txt").read_text()
+    return load_prompt(BASE_DIR / "system_prompt.txt")
 
 def load_developer_prompt():
-    return (BASE_DIR / "developer_prompt.txt").read_text()
+    return load_prompt(BASE_DIR / "developer_prompt.txt")
@@ -0,0 +1,106 @@
+# agents/common/prompt_registry.py
+
+import os
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+AGENTS_DIR = Path(__file__).resolve().parents[1]
+
+
+class PromptRegistry:
+    """
+    Process-wide cache of prompt files.
+
+    - Files are read once and kept in memory
+    - Cached text is revalidated by mtime at most every `check_interval`
+      seconds (0 → every call, None → only on explicit reload())
+    """
+
+    def __init__(self, check_interval: float | None = 2.0):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        # path -> (text, mtime, last_checked)
+        self._cache = {}
+
+    def get(self, path) -> str:
+        # Keyed by the path as given: resolving it would cost syscalls per call
+        path = Path(path)
+        now = time.monotonic()
+
+        cached = self._cache.get(path)
+        if cached is not None:
+            text, mtime, last_checked = cached
+            if self.check_interval is None or now - last_checked < self.check_interval:
+                return text
+            if _mtime(path) == mtime:
+                self._cache[path] = (text, mtime, now)
+                return text
+
+        with self._lock:
+            if not path.exists():
+                raise FileNotFoundError(f"Missing prompt template: {path}")
+            mtime = _mtime(path)
+            text = path.read_text()
+            self._cache[path] = (text, mtime, now)
+            return text
+
+    def reload(self, path=None):
+        """
+        Drop cached text (one file, or everything) so the next get() re-reads it.
+        """
+        with self._lock:
+            if path is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(Path(path), None)
+
+
+def _mtime(path: Path):
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _check_interval_from_env():
+    raw = os.getenv("PROMPT_CHECK_INTERVAL", "2")
+    return None if raw.lower() == "never" else float(raw)
+
+
+REGISTRY = PromptRegistry(check_interval=_check_interval_from_env())
+
+
+def load_prompt(path) -> str:
+    return REGISTRY.get(path)
+
+
+def agent_prompt_path(agent_name: str, name: str) -> Path:
+    """
+    agents/<agent>/prompts/<name>.txt
+    """
+    return AGENTS_DIR / agent_name / "prompts" / f"{name}.txt"
+
+
+# -------------------------------------------------
+# Static prompt prefix
+# -------------------------------------------------
+
+@lru_cache(maxsize=64)
+def prompt_prefix(system_prompt: str, developer_prompt: str) -> str:
+    """
+    The part of every chat prompt that does not depend on the turn.
+    Cached on the prompt strings, so an edited file yields a new prefix.
+    """
+    return "\n\n".join([
+        "SYSTEM ROLE:\n" + system_prompt,
+        "\nDEVELOPER RULES:\n" + developer_prompt,
+    ])
+
+
+def get_static_prefix(agent_name: str) -> str:
+    return prompt_prefix(
+        load_prompt(agent_prompt_path(agent_name, "system_prompt")),
+        load_prompt(agent_prompt_path(agent_name, "developer_prompt")),
+    )
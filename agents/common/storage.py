@@ -1,9 +1,12 @@
 import sqlite3
 import json
+import hashlib
 from pathlib import Path
 import uuid
 from datetime import datetime
 
+from intelligence.dedupe import simhash
+
 BASE_DIR = Path(__file__).parent
 DB_PATH = BASE_DIR / "data" / "entries.db"
 DB_PATH.parent.mkdir(exist_ok=True)
@@ -16,6 +19,11 @@ def get_conn():
     return conn
 
 
+def _column_exists(cur, table, column):
+    cur.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in cur.fetchall())
+
+
 def init_db():
     print(">>> init_db using DB_PATH =", DB_PATH.resolve())
     conn = get_conn()
@@ -37,6 +45,33 @@ def init_db():
         )
     """)
 
+    # near-duplicate signature (intelligence/dedupe.py), set at write time
+    if not _column_exists(cur, "entries", "simhash"):
+        cur.execute("ALTER TABLE entries ADD COLUMN simhash TEXT")
+
+    # user_version 1: tokenizer keeps he/she/his/her; older simhashes are
+    # dropped and recomputed (backfill_simhashes / on read)
+    if cur.execute("PRAGMA user_version").fetchone()[0] < 1:
+        cur.execute("UPDATE entries SET simhash = NULL")
+        cur.execute("PRAGMA user_version = 1")
+
+    # one-line condensed text (intelligence/microsummary.py), NULL until
+    # computed and reset to NULL whenever the content changes
+    if not _column_exists(cur, "entries", "summary"):
+        cur.execute("ALTER TABLE entries ADD COLUMN summary TEXT")
+
+    # incremental readers (retrieval index, sync) scan by updated_at
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_entries_agent_updated
+        ON entries (agent, updated_at)
+    """)
+
+    # day / period reads (intelligence/rollups.py) scan by created_at
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_entries_agent_created
+        ON entries (agent, created_at)
+    """)
+
     conn.commit()
     conn.close()
 
@@ -55,8 +90,8 @@ def add_entry(agent, content, type="note", subject=None, tags=None):
     serialized = _serialize_content(content)
     cur.execute("""
         INSERT INTO entries
-        (uuid, agent, type, subject, tags, content, created_at, updated_at, deleted)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
+        (uuid, agent, type, subject, tags, content, created_at, updated_at, deleted, simhash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, ?)
     """, (
         str(uuid.uuid4()),
         agent,
@@ -66,6 +101,7 @@ def add_entry(agent, content, type="note", subject=None, tags=None):
         serialized,
         now,
         now,
+        content_simhash(serialized),
     ))
 
     conn.commit()
@@ -80,9 +116,9 @@ def update_entry(entry_id, new_content):
     serialized = _serialize_content(new_content)
     cur.execute("""
         UPDATE entries
-        SET content = ?, updated_at = ?
+        SET content = ?, updated_at = ?, simhash = ?, summary = NULL
         WHERE id = ? AND deleted = 0
-    """, (serialized, datetime.utcnow().isoformat(), entry_id))
+    """, (serialized, datetime.utcnow().isoformat(), content_simhash(serialized), entry_id))
 
     conn.commit()
     conn.close()
@@ -117,30 +153,232 @@ def get_entries(agent=None, type=None, limit=None):
     rows = cur.fetchall()
     conn.close()
 
-    results = []
+    return [_row_to_entry(r) for r in rows]
+
+
+def _row_to_entry(r):
+    try:
+        payload = json.loads(r["content"]) if r["content"] else {}
+    except Exception:
+        payload = {}
+
+    return {
+        "id": r["id"],
+        "uuid": r["uuid"],
+        "agent": r["agent"],
+        "type": r["type"],
+        "subject": r["subject"],
+        "tags": json.loads(r["tags"]) if r["tags"] else [],
+        "content": payload.get("content", []),          # ✅ list[str]
+        "schema_version": payload.get("schema_version", 1),
+        "created_at": r["created_at"],
+        "updated_at": r["updated_at"],
+        "simhash": r["simhash"],
+        "summary": r["summary"],
+    }
+
+
+
+def get_entries_between(agent, start, end, type=None):
+    """
+    Live entries with start <= created_at < end (ISO timestamps, UTC),
+    oldest first.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+
+    query = """
+        SELECT * FROM entries
+        WHERE deleted = 0 AND agent = ? AND created_at >= ? AND created_at < ?
+    """
+    params = [agent, start, end]
+
+    if type:
+        query += " AND type = ?"
+        params.append(type)
+
+    query += " ORDER BY created_at"
 
+    cur.execute(query, params)
+    rows = cur.fetchall()
+    conn.close()
+
+    return [_row_to_entry(r) for r in rows]
+
+
+def get_entries_changed_since(agent, since=None):
+    """
+    Rows created / updated / deleted after `since` (ISO timestamp),
+    oldest change first. Includes deleted rows so indexes can drop them.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+
+    query = "SELECT * FROM entries WHERE agent = ?"
+    params = [agent]
+
+    if since:
+        query += " AND updated_at > ?"
+        params.append(since)
+
+    query += " ORDER BY updated_at"
+
+    cur.execute(query, params)
+    rows = cur.fetchall()
+    conn.close()
+
+    results = []
     for r in rows:
-        try:
-            payload = json.loads(r["content"]) if r["content"] else {}
-        except Exception:
-            payload = {}
-
-        results.append({
-            "id": r["id"],
-            "uuid": r["uuid"],
-            "agent": r["agent"],
-            "type": r["type"],
-            "subject": r["subject"],
-            "tags": json.loads(r["tags"]) if r["tags"] else [],
-            "content": payload.get("content", []),          # ✅ list[str]
-            "schema_version": payload.get("schema_version", 1),
-            "created_at": r["created_at"],
-            "updated_at": r["updated_at"],
-        })
+        entry = _row_to_entry(r)
+        entry["deleted"] = bool(r["deleted"])
+        results.append(entry)
 
     return results
 
 
+def iter_entries_changed_since(agent, since=None, batch_size=1000):
+    """
+    Streaming get_entries_changed_since: yields the same rows (with
+    "deleted"), oldest change first, fetching batch_size rows at a time
+    so memory stays flat however large the store is.
+    """
+    conn = get_conn()
+    try:
+        cur = conn.cursor()
+
+        query = "SELECT * FROM entries WHERE agent = ?"
+        params = [agent]
+
+        if since:
+            query += " AND updated_at > ?"
+            params.append(since)
+
+        query += " ORDER BY updated_at"
+        cur.execute(query, params)
+
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            for r in rows:
+                entry = _row_to_entry(r)
+                entry["deleted"] = bool(r["deleted"])
+                yield entry
+    finally:
+        conn.close()
+
+
+def get_entries_without_summary(agent, limit=50):
+    """
+    Live entries whose micro-summary is missing or stale, oldest first.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT * FROM entries
+        WHERE deleted = 0 AND agent = ? AND summary IS NULL
+        ORDER BY created_at
+        LIMIT ?
+    """, (agent, limit))
+    rows = cur.fetchall()
+    conn.close()
+
+    return [_row_to_entry(r) for r in rows]
+
+
+def set_entry_summaries(updates):
+    """
+    updates: [(summary, entry_id, updated_at)]
+    A row edited after its summary was computed (updated_at moved on)
+    is left alone, so a stale summary is never stored.
+    Returns the number of rows updated.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+
+    updated = 0
+    for summary, entry_id, updated_at in updates:
+        cur.execute(
+            "UPDATE entries SET summary = ? WHERE id = ? AND updated_at = ?",
+            (summary, entry_id, updated_at),
+        )
+        updated += cur.rowcount
+
+    conn.commit()
+    conn.close()
+    return updated
+
+
+def content_simhash(serialized: str):
+    """
+    SimHash of the user text inside a serialized payload.
+    """
+    try:
+        payload = json.loads(serialized) if serialized else {}
+    except Exception:
+        return None
+    return simhash(" ".join(payload.get("content", [])))
+
+
+def backfill_simhashes(agent=None):
+    """
+    Compute simhash for rows written before the column existed.
+    Returns the number of rows updated.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+
+    query = "SELECT id, content FROM entries WHERE simhash IS NULL AND deleted = 0"
+    params = []
+    if agent:
+        query += " AND agent = ?"
+        params.append(agent)
+
+    rows = cur.execute(query, params).fetchall()
+    updates = [(content_simhash(r["content"]), r["id"]) for r in rows]
+    cur.executemany("UPDATE entries SET simhash = ? WHERE id = ?", updates)
+
+    conn.commit()
+    conn.close()
+    return len(updates)
+
+
+def get_entries_fingerprint(agent, type=None, start=None, end=None):
+    """
+    Cheap hash of an agent's live entries (ids + updated_at).
+    Changes whenever an entry is added, edited or deleted.
+
+    - start / end: only entries with start <= created_at < end
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+
+    query = "SELECT id, updated_at FROM entries WHERE deleted = 0 AND agent = ?"
+    params = [agent]
+
+    if type:
+        query += " AND type = ?"
+        params.append(type)
+
+    if start:
+        query += " AND created_at >= ?"
+        params.append(start)
+
+    if end:
+        query += " AND created_at < ?"
+        params.append(end)
+
+    query += " ORDER BY id"
+
+    h = hashlib.sha1()
+    for r in cur.execute(query, params):
+        h.update(f"{r['id']}:{r['updated_at']};".encode("utf-8"))
+
+    conn.close()
+    return h.hexdigest()
+
+
 
 def _serialize_content(content):
     """
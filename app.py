@@ -1,17 +1,23 @@
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, Response, g, render_template, request, jsonify, session, stream_with_context
 from dotenv import load_dotenv
 import logging
 import os
 import uuid
 import json
 import sqlite3
+import time
 from pathlib import Path
-from google import genai
 from datetime import datetime, timedelta
 
 from intelligence.engine import generate_report_content, persist_report
-from intelligence.storage import get_reports, init_db as init_intelligence_db
+from intelligence.storage import InvalidCursorError, get_latest_report, get_reports_page, init_db as init_intelligence_db
 from intelligence.category_summary import generate_category_summary
+from intelligence.retrieval import retrieve_relevant_texts
+from intelligence.dedupe import find_near_duplicates
+from intelligence.text import entry_text
+from intelligence.schedules import ReportSchedule, ReportScheduler
+from intelligence.microsummary import summarize_pending_entries
+from intelligence.rollups import ensure_daily_digests, period_entries, init_db as init_rollups_db
 
 from agents.ami.intelligence_policy import AmiIntelligencePolicy
 from agents.workbench.intelligence_policy import WorkbenchIntelligencePolicy
@@ -21,14 +27,26 @@ from agents.steward.intelligence_policy import StewardIntelligencePolicy
 from agents.common.storage import init_db as init_entries_db
 from agents.common.storage import add_entry as common_add_entry
 from agents.common.storage import get_entries as common_get_entries
+from agents.common.storage import get_entries_fingerprint
+from agents.common.storage import backfill_simhashes, content_simhash
 
-from session.context import SessionContext
+from session.store import SessionBusyError, SessionConflictError, checkin, checkout, create_session_store
 from agents.common.subjects import resolve_subjects_if_any
 from agents.common.enforcement import enforce_subjects
 from agents.common.agent_policy import AgentSubjectPolicy
+from agents.common.prompt_registry import REGISTRY as PROMPT_REGISTRY, prompt_prefix
 
-from sync.sync_service import sync_rows_to_sheets
-from sync.local_spreadsheet_service import sync_rows_to_csv
+from sync.runner import run_syncs, sync_one
+from sync.google_auth import TOKEN_PATH as GOOGLE_TOKEN_PATH, start_token_refresher
+from sync.sync_state import get_sync_state, init_db as init_sync_state_db
+
+from jobs.queue import enqueue, get_job, init_db as init_jobs_db
+from jobs.worker import notify as notify_workers, register_handler, start_workers
+
+from llm.backend import get_backend, get_circuit_state
+from llm.metrics import get_metrics as get_llm_metrics, get_recent_calls, init_db as init_llm_metrics_db, llm_call_context
+from llm.resilience import LLMUnavailableError, llm_deadline
+from llm.tokens import estimate_tokens, pack_texts, remaining_budget, get_truncation_metrics
 
 
 # -------------------------------------------------
@@ -80,6 +98,24 @@ from agents.steward.prompts.prompt_loader import (
 # Agent registry (unified storage)
 # -------------------------------------------------
 
+# Token budgets (estimated tokens, see llm/tokens.py)
+# - context: recent entries injected into /api/chat
+# - report: whole user prompt for weekly reflections / category summaries
+DEFAULT_TOKEN_BUDGET = {"prompt": 8000, "context": 1500, "report": 24000}
+
+# Share of sentences kept by extractive pre-summarization before report
+# prompts (None = send everything; caretaker keeps every medical detail)
+DEFAULT_COMPRESSION_RATIO = 0.5
+
+# entry_summaries: one-line per-entry digests (intelligence/microsummary.py),
+# computed in the background after each save and swapped in for the
+# oldest entries when a report prompt is over budget
+
+# Upper bound on total LLM time (queueing + retries) per request / job
+LLM_DEADLINE_SECONDS = {"chat": 30, "report": 600}
+
+LLM_UNAVAILABLE_REPLY = "I can't reach the language model right now. Please try again in a moment."
+
 AGENTS = {
     "ami": {
         "system_prompt": load_ami_system,
@@ -88,6 +124,9 @@ AGENTS = {
         "subject_policy": AgentSubjectPolicy(require_domain=True, require_person=False),
         "entry_type": "observation",
         "category_label": "Development Area",
+        "token_budget": DEFAULT_TOKEN_BUDGET,
+        "compression_ratio": DEFAULT_COMPRESSION_RATIO,
+        "entry_summaries": True,
     },
     "workbench": {
         "system_prompt": load_workbench_system,
@@ -96,6 +135,9 @@ AGENTS = {
         "subject_policy": AgentSubjectPolicy(require_domain=True, require_person=False),
         "entry_type": "note",
         "category_label": "Learning Area",
+        "token_budget": DEFAULT_TOKEN_BUDGET,
+        "compression_ratio": DEFAULT_COMPRESSION_RATIO,
+        "entry_summaries": True,
     },
     "caretaker": {
         "system_prompt": load_caretaker_system,
@@ -104,6 +146,9 @@ AGENTS = {
         "subject_policy": AgentSubjectPolicy(require_domain=True, require_person=True),
         "entry_type": "medical",
         "category_label": "Family Member",
+        "token_budget": DEFAULT_TOKEN_BUDGET,
+        "compression_ratio": None,
+        "entry_summaries": False,
     },
     "steward": {
         "system_prompt": load_steward_system,
@@ -112,6 +157,9 @@ AGENTS = {
         "subject_policy": AgentSubjectPolicy(require_domain=False, require_person=False, require_project=True),
         "entry_type": "project_event",
         "category_label": "Project",
+        "token_budget": DEFAULT_TOKEN_BUDGET,
+        "compression_ratio": DEFAULT_COMPRESSION_RATIO,
+        "entry_summaries": True,
     },
 }
 
@@ -139,6 +187,36 @@ SYNC_CONFIG = {
 }
 
 
+# -------------------------------------------------
+# Report precomputation (local time, cron syntax)
+# -------------------------------------------------
+
+REPORT_SCHEDULES = [
+    ReportSchedule("ami", "daily_digest", "10 0 * * *"),
+    ReportSchedule("workbench", "daily_digest", "10 0 * * *"),
+    ReportSchedule("steward", "daily_digest", "10 0 * * *"),
+    ReportSchedule("ami", "weekly_reflection", "0 3 * * 1"),
+    ReportSchedule("workbench", "weekly_reflection", "0 3 * * 1"),
+    ReportSchedule("steward", "weekly_reflection", "0 3 * * 1"),
+    ReportSchedule("ami", "monthly_reflection", "0 4 1 * *"),
+    ReportSchedule("workbench", "monthly_reflection", "0 4 1 * *"),
+    ReportSchedule("steward", "monthly_reflection", "0 4 1 * *"),
+    ReportSchedule("ami", "category_summary", "30 3 * * *"),
+    ReportSchedule("workbench", "category_summary", "30 3 * * *"),
+    ReportSchedule("caretaker", "category_summary", "30 3 * * *"),
+    ReportSchedule("steward", "category_summary", "30 3 * * *"),
+]
+
+# Days covered by each reflection (built from daily digests, intelligence/rollups.py)
+REFLECTION_DAYS = {"weekly_reflection": 7, "monthly_reflection": 30}
+
+# Closed days re-checked by the nightly digest job (late edits / backfill)
+DIGEST_LOOKBACK_DAYS = 7
+
+# Scheduled runs wait until no request has arrived for this long
+SCHEDULER_IDLE_SECONDS = 300
+
+
 # -------------------------------------------------
 # Setup
 # -------------------------------------------------
@@ -147,8 +225,6 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-
 ROOT_DIR = Path(__file__).resolve().parent
 
 app = Flask(
@@ -158,38 +234,74 @@ app = Flask(
 )
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "dev-secret")
 
+# Targets synced in parallel by one /api/sync/all job
+SYNC_WORKERS = int(os.getenv("SYNC_WORKERS", "4"))
+
+# `python app.py` runs debug mode: the reloader imports this module in a
+# file-watcher process too. Background threads (job workers, scheduler,
+# token refresher) only start in the process that serves requests.
+BACKGROUND_THREADS = __name__ != "__main__" or os.getenv("WERKZEUG_RUN_MAIN") == "true"
+
 init_entries_db()
 init_intelligence_db()
+init_rollups_db()
+init_jobs_db()
+init_llm_metrics_db()
+init_sync_state_db()
 
-SESSION_CONTEXTS = {}
+# One SessionContext per (session id, agent), see session/store.py:
+# - memory: bounded LRU/TTL dict (single process)
+# - sqlite: shared by all worker processes (SESSION_BACKEND=sqlite)
+SESSION_CONTEXTS = create_session_store()
 
 
 # -------------------------------------------------
 # Helpers: LLM + session context
 # -------------------------------------------------
 
-def call_llm(system_prompt, developer_prompt, context, user_message):
-    prompt_parts = [
-        "SYSTEM ROLE:\n" + system_prompt,
-        "\nDEVELOPER RULES:\n" + developer_prompt,
-    ]
+# Model + client come from llm.backend (LLM_BACKEND=gemini | fake)
+CHAT_CONFIG = {
+    "temperature": 0.2,
+    "top_p": 0.9,
+    "max_output_tokens": 1500,
+}
+
+
+def build_prompt(system_prompt, developer_prompt, context, user_message, token_budget=None):
+    if context and token_budget:
+        # Context is the only elastic part: trim it to what the fixed parts leave
+        budget = remaining_budget(token_budget, prompt_prefix(system_prompt, developer_prompt), user_message)
+        lines, stats = pack_texts(context.splitlines(), budget)
+        if stats["truncated"]:
+            logger.info("call_llm context truncated: %s", stats)
+        context = "\n".join(lines)
+
+    prompt_parts = [prompt_prefix(system_prompt, developer_prompt)]
 
     if context:
         prompt_parts.append("\nCONTEXT:\n" + context)
 
     prompt_parts.append("\nUSER MESSAGE:\n" + user_message)
 
-    response = client.models.generate_content(
-        model="models/gemini-2.5-flash",
-        contents="\n\n".join(prompt_parts),
-        config={
-            "temperature": 0.2,
-            "top_p": 0.9,
-            "max_output_tokens": 1500,
-        },
+    return "\n\n".join(prompt_parts)
+
+
+def call_llm(system_prompt, developer_prompt, context, user_message, token_budget=None):
+    return get_backend().generate(
+        build_prompt(system_prompt, developer_prompt, context, user_message, token_budget),
+        config=CHAT_CONFIG,
     )
 
-    return response.text.strip()
+
+def call_llm_stream(system_prompt, developer_prompt, context, user_message, token_budget=None):
+    """
+    Same prompt as call_llm, but returns an iterator of text chunks
+    as the model produces them.
+    """
+    return get_backend().stream(
+        build_prompt(system_prompt, developer_prompt, context, user_message, token_budget),
+        config=CHAT_CONFIG,
+    )
 
 
 # def get_session_context(agent: str):
@@ -219,10 +331,58 @@ def get_session_context(agent):
         "key": key
     })
 
-    if key not in SESSION_CONTEXTS:
-        SESSION_CONTEXTS[key] = SessionContext()
+    # Locked + loaded once per request, so concurrent requests of the same
+    # session (chat + draft autosave) apply their changes one at a time.
+    # Saved (if changed) and unlocked by release_session_contexts().
+    loaded = g.setdefault("session_contexts", {})
+    if key not in loaded:
+        loaded[key] = checkout(SESSION_CONTEXTS, key)
+
+    return loaded[key][0]
+
+
+def release_session_contexts():
+    """
+    Save + unlock this request's session contexts. Runs after the view;
+    call it earlier before slow work (LLM calls) that no longer needs ctx.
+    Raises SessionConflictError if another worker changed the same fields.
+    """
+    loaded = g.pop("session_contexts", None)
+    conflict = None
+    for key, (ctx, snapshot) in (loaded or {}).items():
+        try:
+            checkin(SESSION_CONTEXTS, key, ctx, snapshot)
+        except SessionConflictError as e:
+            conflict = e
+    if conflict:
+        raise conflict
+
+
+@app.after_request
+def _save_session_contexts(response):
+    # after_request (not teardown) so a lost compare-and-swap can still
+    # turn the response into a 409
+    try:
+        release_session_contexts()
+    except SessionConflictError as e:
+        logger.warning("%s", e)
+        response, status = _session_busy(e)
+        response.status_code = status
+    return response
+
+
+@app.teardown_request
+def _release_session_contexts(exc):
+    # error paths skip after_request; still unlock
+    try:
+        release_session_contexts()
+    except SessionConflictError as e:
+        logger.warning("%s", e)
+
 
-    return SESSION_CONTEXTS[key]
+@app.errorhandler(SessionBusyError)
+def _session_busy(e):
+    return jsonify({"status": "busy", "message": "Another request is still updating this conversation."}), 409
 
 
 def clear_context_after_save(ctx):
@@ -277,13 +437,41 @@ def build_entry_payload(ctx):
     }
 
 
-def build_context(agent):
-    rows = common_get_entries(agent=agent, limit=5)
+def build_context(agent, user_message=None, limit=20):
+    """
+    Entries most relevant to user_message (BM25), falling back to the
+    most recent ones when nothing matches. Packed to the agent's budget.
+    """
+    budget = AGENTS[agent]["token_budget"]["context"]
+
+    if user_message:
+        prefix = "Relevant entries:"
+        texts = retrieve_relevant_texts(
+            agent,
+            user_message,
+            k=limit,
+            token_budget=budget - estimate_tokens(prefix),
+        )
+        if texts:
+            return prefix + "\n" + "\n".join(f"- {t}" for t in texts)
+
+    rows = common_get_entries(agent=agent, limit=limit)
     if not rows:
         return ""
 
     prefix = "Recent entries:"
-    lines = [f"- {r.get('text', '')}" for r in rows]
+
+    # rows are newest first → packing keeps the most recent entries
+    lines, stats = pack_texts(
+        [f"- {entry_text(r)}" for r in rows if entry_text(r)],
+        budget - estimate_tokens(prefix),
+    )
+    if stats["truncated"]:
+        logger.info("build_context truncated for %s: %s", agent, stats)
+
+    if not lines:
+        return ""
+
     return prefix + "\n" + "\n".join(lines)
 
 
@@ -356,6 +544,7 @@ def add_observation_api():
         subject=subject,
         content=content,
     )
+    queue_entry_summaries(agent)
 
     clear_context_after_save(ctx)
     return jsonify({"status": "saved"})
@@ -364,6 +553,32 @@ def add_observation_api():
 
 
 
+@app.route("/api/observations/duplicates", methods=["GET"])
+def get_duplicate_observations():
+    agent = get_agent()
+    if agent not in AGENTS:
+        return jsonify({"error": "Unknown agent"}), 400
+
+    backfill_simhashes(agent)
+    max_distance = request.args.get("max_distance", default=3, type=int)
+
+    groups = find_near_duplicates(
+        common_get_entries(agent=agent),
+        max_distance=max(0, min(max_distance, 3)),
+    )
+
+    return jsonify({
+        "status": "ok",
+        "groups": [
+            {
+                "keep": g["keep"]["id"],
+                "duplicates": [{"id": e["id"], "distance": d} for e, d in g["duplicates"]],
+            }
+            for g in groups
+        ],
+    })
+
+
 def _entries_db_path():
     # same DB as agents.common.storage is using (based on your init log)
     return str(Path(__file__).resolve().parent / "agents" / "common" / "data" / "entries.db")
@@ -411,10 +626,11 @@ def update_observation(entry_id: int):
         new_payload_str = json.dumps(payload, ensure_ascii=False)
 
         conn.execute(
-            "UPDATE entries SET content = ?, updated_at = ? WHERE id = ?",
-            (new_payload_str, datetime.utcnow().isoformat(), entry_id),
+            "UPDATE entries SET content = ?, updated_at = ?, simhash = ?, summary = NULL WHERE id = ?",
+            (new_payload_str, datetime.utcnow().isoformat(), content_simhash(new_payload_str), entry_id),
         )
         conn.commit()
+        queue_entry_summaries(agent)
 
         return jsonify({"status": "updated"})
     finally:
@@ -461,6 +677,7 @@ def save_draft():
         subject=subject,
         content=content,
     )
+    queue_entry_summaries(agent)
 
     clear_context_after_save(ctx)
 
@@ -493,18 +710,11 @@ def get_draft():
     })
 
 
-@app.route("/api/chat", methods=["POST"])
-def chat():
-    agent = get_agent()
-    cfg = AGENTS.get(agent)
-    if not cfg:
-        return jsonify({"reply": ""})
-
-    user_message = (request.json or {}).get("message", "").strip()
-    if not user_message:
-        return jsonify({"reply": ""})
-
-    ctx = get_session_context(agent)
+def chat_preflight(agent, cfg, ctx, user_message):
+    """
+    Draft capture + subject resolution that happens before any LLM call.
+    Returns a canned reply, or None when the message should go to the LLM.
+    """
     policy = cfg.get("subject_policy")
 
     # -------------------------------------------------
@@ -513,9 +723,7 @@ def chat():
     if looks_like_record(user_message):
         ctx.collected_text.append(user_message)
 
-        return jsonify({
-            "reply": "Got it. I've added this to your draft. You can review and save it from the timeline."
-        })
+        return "Got it. I've added this to your draft. You can review and save it from the timeline."
 
     # -------------------------------------------------
     # 1) Subject resolution (ONLY for non-record messages)
@@ -527,9 +735,9 @@ def chat():
         if policy:
             ok, msg = enforce_subjects(policy, ctx)
             if not ok:
-                return jsonify({"reply": msg})
+                return msg or ""
 
-        return jsonify({"reply": "Okay, I understand. Please continue."})
+        return "Okay, I understand. Please continue."
 
     # -------------------------------------------------
     # 2) Enforce required subjects
@@ -537,76 +745,425 @@ def chat():
     if policy:
         ok, msg = enforce_subjects(policy, ctx)
         if not ok:
-            return jsonify({"reply": msg})
+            return msg or ""
+
+    return None
+
+
+def chat_llm_args(agent, cfg, user_message):
+    return {
+        "system_prompt": cfg["system_prompt"](),
+        "developer_prompt": cfg["developer_prompt"](),
+        "context": build_context(agent, user_message),
+        "user_message": user_message,
+        "token_budget": cfg["token_budget"]["prompt"],
+    }
+
+
+@app.route("/api/chat", methods=["POST"])
+def chat():
+    agent = get_agent()
+    cfg = AGENTS.get(agent)
+    if not cfg:
+        return jsonify({"reply": ""})
+
+    user_message = (request.json or {}).get("message", "").strip()
+    if not user_message:
+        return jsonify({"reply": ""})
+
+    ctx = get_session_context(agent)
+
+    reply = chat_preflight(agent, cfg, ctx, user_message)
+    release_session_contexts()
+    if reply is not None:
+        return jsonify({"reply": reply})
 
     # -------------------------------------------------
     # 3) Normal chat
     # -------------------------------------------------
-    reply = call_llm(
-        system_prompt=cfg["system_prompt"](),
-        developer_prompt=cfg["developer_prompt"](),
-        context=build_context(agent),
-        user_message=user_message,
-    )
+    try:
+        with llm_call_context(agent=agent, route="chat"), llm_deadline(LLM_DEADLINE_SECONDS["chat"]):
+            reply = call_llm(**chat_llm_args(agent, cfg, user_message))
+    except LLMUnavailableError as e:
+        logger.warning("Chat LLM unavailable for %s: %s", agent, e)
+        return jsonify({"reply": LLM_UNAVAILABLE_REPLY, "error": "llm_unavailable"}), 503
 
     return jsonify({"reply": reply})
 
 
+def _sse(data: dict, event: str = None) -> str:
+    payload = json.dumps(data, ensure_ascii=False)
+    return (f"event: {event}\n" if event else "") + f"data: {payload}\n\n"
 
 
+@app.route("/api/chat/stream", methods=["POST"])
+def chat_stream():
+    """
+    Server-sent events version of /api/chat.
 
-
-@app.route("/api/intelligence/<agent>/category_summary", methods=["POST"])
-def generate_category_summary_route(agent):
+    Events:
+    - data: {"delta": "..."}   (one per chunk)
+    - event: done              (reply finished)
+    - event: error             (LLM failed mid-stream)
+    """
+    agent = get_agent()
     cfg = AGENTS.get(agent)
-    if not cfg:
-        return jsonify({"error": "Unknown agent"}), 400
+    user_message = (request.get_json(silent=True) or {}).get("message", "").strip()
+
+    # Session work happens before the response starts: a new session id
+    # must be set while the Set-Cookie header can still be sent, and the
+    # context is saved (or found busy / conflicting) before streaming
+    reply, busy = None, False
+    if cfg and user_message:
+        try:
+            reply = chat_preflight(agent, cfg, get_session_context(agent), user_message)
+            release_session_contexts()
+        except SessionBusyError:
+            busy = True
+
+    def generate():
+        if busy:
+            yield _sse({"message": "Another request is still updating this conversation."}, event="error")
+            return
+        if not cfg or not user_message:
+            yield _sse({}, event="done")
+            return
+
+        if reply is not None:
+            yield _sse({"delta": reply})
+            yield _sse({}, event="done")
+            return
+
+        try:
+            with llm_call_context(agent=agent, route="chat_stream"), llm_deadline(LLM_DEADLINE_SECONDS["chat"]):
+                for chunk in call_llm_stream(**chat_llm_args(agent, cfg, user_message)):
+                    yield _sse({"delta": chunk})
+        except LLMUnavailableError as e:
+            logger.warning("Streaming chat LLM unavailable for %s: %s", agent, e)
+            yield _sse({"message": LLM_UNAVAILABLE_REPLY}, event="error")
+            return
+        except Exception:
+            logger.exception("Streaming chat failed for %s", agent)
+            yield _sse({"message": "LLM call failed"}, event="error")
+            return
+
+        yield _sse({}, event="done")
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+# -------------------------------------------------
+# Report jobs (run by jobs.worker threads)
+# -------------------------------------------------
+
+def report_fingerprint(agent, report_type):
+    """
+    Fingerprint of a report's inputs. Reflections cover a moving window,
+    so theirs also changes when the window moves.
+    """
+    days = REFLECTION_DAYS.get(report_type)
+    if days is None:
+        return get_entries_fingerprint(agent)
+
+    start = (datetime.utcnow().date() - timedelta(days=days - 1)).isoformat()
+    return f"{start}:{get_entries_fingerprint(agent, start=start)}"
+
 
+def build_category_summary(agent, progress=None):
+    cfg = AGENTS[agent]
+
+    # taken before reading: a later edit makes the next run rebuild
+    fingerprint = report_fingerprint(agent, "category_summary")
     entries = common_get_entries(agent=agent)
     if not entries:
-        return jsonify({"status": "no_data"}), 200
+        return {"status": "no_data"}
 
     content = generate_category_summary(
         agent_name=agent,
         entries=entries,
         llm_call_fn=call_llm_simple,
+        token_budget=cfg["token_budget"]["report"],
+        progress_fn=progress,
+        compression_ratio=cfg["compression_ratio"],
+        use_summaries=cfg["entry_summaries"],
     )
 
     report = persist_report(
         agent_name=agent,
         report_type="category_summary",
         content=content,
+        fingerprint=fingerprint,
     )
 
-    return jsonify({"status": "ok", "report": report})
+    return {"status": "ok", "report": report}
 
 
-@app.route("/api/intelligence/<agent>/weekly_reflection", methods=["POST"])
-def generate_weekly_reflection(agent):
-    cfg = AGENTS.get(agent)
-    if not cfg:
-        return jsonify({"error": "Unknown agent"}), 400
+def build_daily_digests(agent, progress=None):
+    cfg = AGENTS[agent]
+    today = datetime.utcnow().date()
+
+    digests = ensure_daily_digests(
+        agent,
+        today - timedelta(days=DIGEST_LOOKBACK_DAYS),
+        today - timedelta(days=1),
+        llm_call_fn=call_llm_simple,
+        compression_ratio=cfg["compression_ratio"],
+        use_summaries=cfg["entry_summaries"],
+        progress_fn=progress,
+    )
+
+    return {"status": "ok", "digests": len(digests)}
 
-    # use shared table entries (last 7 days selection can be done in engine/template)
-    entries = common_get_entries(agent=agent, limit=200)
+
+def build_reflection(agent, report_type, progress=None):
+    """
+    Weekly / monthly reflection composed from daily digests:
+    one small prompt per changed day + one for the reflection itself.
+    """
+    cfg = AGENTS[agent]
+    fingerprint = report_fingerprint(agent, report_type)
+
+    def digest_progress(fraction, message=None):
+        if progress:
+            progress(0.8 * fraction, message)
+
+    entries = period_entries(
+        agent,
+        REFLECTION_DAYS[report_type],
+        llm_call_fn=call_llm_simple,
+        compression_ratio=cfg["compression_ratio"],
+        use_summaries=cfg["entry_summaries"],
+        progress_fn=digest_progress,
+    )
     if not entries:
-        return jsonify({"status": "no_data", "message": "No entries recorded in the past 7 days."})
+        days = REFLECTION_DAYS[report_type]
+        return {"status": "no_data", "message": f"No entries recorded in the past {days} days."}
+
+    if progress:
+        progress(0.8, "Generating reflection")
 
     content = generate_report_content(
         agent_name=agent,
-        report_type="weekly_reflection",
+        report_type=report_type,
         entries=entries,
         policy=cfg["reflection_policy"],
         llm_call_fn=call_llm,
+        token_budget=cfg["token_budget"]["report"],
     )
 
     report = persist_report(
         agent_name=agent,
-        report_type="weekly_reflection",
+        report_type=report_type,
         content=content,
+        fingerprint=fingerprint,
     )
 
-    return jsonify({"status": "ok", "report": report})
+    return {"status": "ok", "report": report}
+
+
+def build_weekly_reflection(agent, progress=None):
+    return build_reflection(agent, "weekly_reflection", progress)
+
+
+def build_monthly_reflection(agent, progress=None):
+    return build_reflection(agent, "monthly_reflection", progress)
+
+
+REPORT_BUILDERS = {
+    "category_summary": build_category_summary,
+    "weekly_reflection": build_weekly_reflection,
+    "monthly_reflection": build_monthly_reflection,
+    "daily_digest": build_daily_digests,
+}
+
+
+def run_report_job(job, progress):
+    """
+    Identical report requests already share one job (enqueue_report's
+    dedupe key includes the input fingerprint). Different reports of one
+    agent running at once share their daily digests instead
+    (DIGEST_FLIGHTS in intelligence/rollups.py).
+    """
+    agent = job["agent"]
+    report_type = job["kind"]
+
+    with (
+        llm_call_context(agent=agent, route="report_job", report_type=report_type),
+        llm_deadline(LLM_DEADLINE_SECONDS["report"]),
+    ):
+        return REPORT_BUILDERS[report_type](agent, progress)
+
+
+def run_entry_summaries_job(job, progress):
+    agent = job["agent"]
+    with (
+        llm_call_context(agent=agent, route="entry_summaries"),
+        llm_deadline(LLM_DEADLINE_SECONDS["report"]),
+    ):
+        count = summarize_pending_entries(agent, call_llm_simple, progress_fn=progress)
+    return {"status": "ok", "summarized": count}
+
+
+def run_sync_job(job, progress):
+    return run_syncs(
+        SYNC_CONFIG,
+        job["params"].get("agents"),
+        full=job["params"].get("full", False),
+        repair=job["params"].get("repair", False),
+        max_workers=SYNC_WORKERS,
+        progress_fn=progress,
+    )
+
+
+def queue_entry_summaries(agent):
+    # one pending job per agent; it drains every entry lacking a summary
+    if not AGENTS.get(agent, {}).get("entry_summaries"):
+        return
+    _, created = enqueue("entry_summaries", agent=agent)
+    if created:
+        notify_workers()
+
+
+for _report_type in REPORT_BUILDERS:
+    register_handler(_report_type, run_report_job)
+register_handler("entry_summaries", run_entry_summaries_job)
+register_handler("sync", run_sync_job)
+if BACKGROUND_THREADS:
+    start_workers(int(os.getenv("JOB_WORKERS", "2")))
+
+    # Keep the Google token fresh in the background so syncs never block on it
+    if any("spreadsheet_id" in c for c in SYNC_CONFIG.values()) and GOOGLE_TOKEN_PATH.exists():
+        start_token_refresher()
+
+
+def enqueue_report(agent, report_type, fingerprint=None):
+    # Same inputs → same dedupe key → callers share the pending job
+    job_id, created = enqueue(
+        report_type,
+        agent=agent,
+        params={"fingerprint": fingerprint or report_fingerprint(agent, report_type)},
+    )
+    if created:
+        notify_workers()
+
+    return job_id, created
+
+
+def queue_report_job(agent, report_type):
+    job_id, created = enqueue_report(agent, report_type)
+
+    return jsonify({
+        "status": "queued",
+        "job_id": job_id,
+        "deduplicated": not created,
+    }), 202
+
+
+LAST_REQUEST_AT = {"t": time.monotonic()}
+
+
+@app.before_request
+def _track_activity():
+    LAST_REQUEST_AT["t"] = time.monotonic()
+
+
+def _server_idle():
+    return time.monotonic() - LAST_REQUEST_AT["t"] >= SCHEDULER_IDLE_SECONDS
+
+
+def run_scheduled_report(agent, report_type):
+    if not common_get_entries(agent=agent, limit=1):
+        return
+
+    # the latest stored report was built from these inputs already
+    fingerprint = report_fingerprint(agent, report_type)
+    latest = get_latest_report(agent, report_type)
+    if latest and latest["fingerprint"] == fingerprint:
+        return
+
+    enqueue_report(agent, report_type, fingerprint)
+
+
+report_scheduler = ReportScheduler(REPORT_SCHEDULES, run_scheduled_report, is_idle=_server_idle)
+if BACKGROUND_THREADS and os.getenv("REPORT_SCHEDULER", "1") == "1":
+    report_scheduler.start()
+
+
+@app.route("/api/intelligence/<agent>/category_summary", methods=["POST"])
+def generate_category_summary_route(agent):
+    cfg = AGENTS.get(agent)
+    if not cfg:
+        return jsonify({"error": "Unknown agent"}), 400
+
+    if not common_get_entries(agent=agent, limit=1):
+        return jsonify({"status": "no_data"}), 200
+
+    return queue_report_job(agent, "category_summary")
+
+
+@app.route("/api/intelligence/<agent>/weekly_reflection", methods=["POST"])
+def generate_weekly_reflection(agent):
+    cfg = AGENTS.get(agent)
+    if not cfg:
+        return jsonify({"error": "Unknown agent"}), 400
+
+    if not common_get_entries(agent=agent, limit=1):
+        return jsonify({"status": "no_data", "message": "No entries recorded in the past 7 days."})
+
+    return queue_report_job(agent, "weekly_reflection")
+
+
+@app.route("/api/intelligence/<agent>/monthly_reflection", methods=["POST"])
+def generate_monthly_reflection(agent):
+    cfg = AGENTS.get(agent)
+    if not cfg:
+        return jsonify({"error": "Unknown agent"}), 400
+
+    if not common_get_entries(agent=agent, limit=1):
+        return jsonify({"status": "no_data", "message": "No entries recorded in the past 30 days."})
+
+    return queue_report_job(agent, "monthly_reflection")
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def get_job_status(job_id):
+    job = get_job(job_id)
+    if not job:
+        return jsonify({"error": "Not found"}), 404
+
+    return jsonify({
+        "id": job["id"],
+        "kind": job["kind"],
+        "agent": job["agent"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "message": job["message"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "finished_at": job["finished_at"],
+    })
+
+
+@app.route("/api/jobs/<job_id>/result", methods=["GET"])
+def get_job_result(job_id):
+    job = get_job(job_id)
+    if not job:
+        return jsonify({"error": "Not found"}), 404
+
+    if job["status"] == "failed":
+        return jsonify({"status": "error", "message": job["error"]}), 500
+
+    if job["status"] != "done":
+        return jsonify({"status": job["status"], "progress": job["progress"]}), 202
+
+    return jsonify(job["result"])
 
 
 @app.route("/api/intelligence/<agent>/reports", methods=["GET"])
@@ -615,8 +1172,36 @@ def get_agent_reports(agent):
         return jsonify({"error": "Unknown agent"}), 400
 
     report_type = request.args.get("type")
-    reports = get_reports(agent=agent, report_type=report_type)
-    return jsonify({"status": "ok", "reports": reports})
+    limit = request.args.get("limit", default=20, type=int)
+    cursor = request.args.get("cursor")
+
+    try:
+        page = get_reports_page(
+            agent=agent,
+            report_type=report_type,
+            limit=max(1, min(limit, 100)),
+            cursor=cursor,
+        )
+    except InvalidCursorError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({"status": "ok", **page})
+
+
+@app.route("/api/intelligence/<agent>/reports/latest", methods=["GET"])
+def get_agent_latest_report(agent):
+    if agent not in AGENTS:
+        return jsonify({"error": "Unknown agent"}), 400
+
+    report_type = request.args.get("type")
+    if not report_type:
+        return jsonify({"error": "Missing type"}), 400
+
+    report = get_latest_report(agent=agent, report_type=report_type)
+    if not report:
+        return jsonify({"status": "no_data"})
+
+    return jsonify({"status": "ok", "report": report})
 
 
 @app.route("/api/sync/google", methods=["POST"])
@@ -628,19 +1213,75 @@ def sync_google():
     if not cfg or not sync_cfg:
         return jsonify({"error": "Sync not supported"}), 400
 
-    rows = common_get_entries(agent=agent)
+    # only entries changed since the last sync, unless ?full=1 / ?repair=1
+    data = request.get_json(silent=True) or {}
+    full = request.args.get("full") == "1" or bool(data.get("full"))
+    repair = request.args.get("repair") == "1" or bool(data.get("repair"))
+
+    return jsonify(sync_one(agent, sync_cfg, full=full, repair=repair))
 
-    if "local_path" in sync_cfg:
-        result = sync_rows_to_csv(rows=rows, output_path=sync_cfg["local_path"])
-        return jsonify(result)
 
-    result = sync_rows_to_sheets(
-        spreadsheet_id=sync_cfg["spreadsheet_id"],
-        sheet_tab=sync_cfg["sheet_tab"],
-        rows=rows,
+@app.route("/api/sync/all", methods=["POST"])
+def sync_all():
+    """
+    Sync every configured agent (or body {"agents": [...]}) in the
+    background; poll /api/jobs/<job_id> for progress, then
+    /api/jobs/<job_id>/result for per-target results.
+    """
+    data = request.get_json(silent=True) or {}
+    agents = data.get("agents") or sorted(SYNC_CONFIG)
+
+    unknown = [a for a in agents if a not in SYNC_CONFIG]
+    if unknown:
+        return jsonify({"error": f"Sync not supported: {', '.join(unknown)}"}), 400
+
+    full = request.args.get("full") == "1" or bool(data.get("full"))
+    repair = request.args.get("repair") == "1" or bool(data.get("repair"))
+    # share a queued sync, but not a running one: it may have read its
+    # changes before the edit this request is meant to push
+    job_id, created = enqueue(
+        "sync",
+        params={"agents": sorted(agents), "full": full, "repair": repair},
+        dedupe_statuses=("pending",),
     )
+    if created:
+        notify_workers()
+
+    return jsonify({
+        "status": "queued",
+        "job_id": job_id,
+        "deduplicated": not created,
+    }), 202
+
+
+@app.route("/api/sync/state", methods=["GET"])
+def get_sync_status():
+    return jsonify({"status": "ok", "targets": get_sync_state(request.args.get("agent"))})
+
+
+@app.route("/api/prompts/reload", methods=["POST"])
+def reload_prompts():
+    PROMPT_REGISTRY.reload()
+    return jsonify({"status": "ok"})
+
+
+@app.route("/api/metrics/llm", methods=["GET"])
+def get_llm_call_metrics():
+    recent = request.args.get("recent", default=0, type=int)
+    data = {"status": "ok", "circuit": get_circuit_state(), **get_llm_metrics()}
+    if recent:
+        data["recent"] = get_recent_calls(limit=min(recent, 500))
+    return jsonify(data)
 
-    return jsonify(result)
+
+@app.route("/api/metrics/sessions", methods=["GET"])
+def get_session_metrics():
+    return jsonify({"status": "ok", "sessions": SESSION_CONTEXTS.stats()})
+
+
+@app.route("/api/metrics/tokens", methods=["GET"])
+def get_token_metrics():
+    return jsonify({"status": "ok", "truncation": get_truncation_metrics()})
 
 
 @app.route("/api/agent", methods=["GET"])
@@ -657,21 +1298,19 @@ def set_active_agent():
     return jsonify({"status": "ok", "agent": agent})
 
 
+SIMPLE_CONFIG = {
+    "temperature": 0.2,
+    "top_p": 0.9,
+    "max_output_tokens": 1800,
+}
+
+
 def call_llm_simple(user_prompt: str) -> str:
     """
     Simple LLM call for summaries / reports.
     No system/developer layering.
     """
-    response = client.models.generate_content(
-        model="models/gemini-2.5-flash",
-        contents=user_prompt,
-        config={
-            "temperature": 0.2,
-            "top_p": 0.9,
-            "max_output_tokens": 1800,
-        },
-    )
-    return (response.text or "").strip()
+    return get_backend().generate(user_prompt, config=SIMPLE_CONFIG)
 
 
 
@@ -1,9 +1,17 @@
 # intelligence/category_summary.py
 
 import json
+import logging
 from collections import defaultdict
 from datetime import datetime
 
+from intelligence.dedupe import collapse_near_duplicates
+from intelligence.extractive import extract_key_sentences
+from intelligence.microsummary import entry_texts_within_budget
+from llm.tokens import pack_texts, remaining_budget
+
+logger = logging.getLogger(__name__)
+
 
 def _latest_timestamp(entries):
     ts = [
@@ -41,18 +49,7 @@ def _collect_raw_text(entries):
 
 
 
-def summarize_with_llm(category, texts, llm_call_fn):
-    """
-    Generic summarization for all agents.
-
-    IMPORTANT:
-    - LLM returns FINAL display-ready Markdown
-    - We do NOT parse the result
-    """
-
-    user_content = "\n\n".join(texts)
-
-    prompt = f"""
+_SUMMARY_PROMPT = """
 You are summarizing a set of personal notes under the category "{category}".
 
 Your goal is to create a clear, reflective summary that is useful for long-term review.
@@ -91,9 +88,46 @@ OUTPUT FORMAT:
 - This output will be rendered directly to the user.
 
 CONTENT:
-{user_content}
+{content}
 """
 
+
+def _summary_prompt(category, content):
+    return _SUMMARY_PROMPT.format(category=category, content=content)
+
+
+def _content_budget(category, token_budget):
+    """
+    Tokens left for the notes after the fixed summary instructions.
+    """
+    return remaining_budget(token_budget, _summary_prompt(category, ""))
+
+
+def summarize_with_llm(category, texts, llm_call_fn, token_budget=None, compression_ratio=None):
+    """
+    Generic summarization for all agents.
+
+    IMPORTANT:
+    - LLM returns FINAL display-ready Markdown
+    - We do NOT parse the result
+    - texts are newest first; with token_budget, older texts that
+      do not fit are dropped
+    - compression_ratio (0–1) keeps only the most informative sentences
+      (extractive, deterministic) before the LLM sees them
+    """
+
+    if compression_ratio:
+        texts = extract_key_sentences(texts, ratio=compression_ratio)
+
+    if token_budget:
+        texts, stats = pack_texts(texts, _content_budget(category, token_budget), separator="\n\n")
+        if stats["truncated"]:
+            logger.info("category %r summary input truncated: %s", category, stats)
+
+    user_content = "\n\n".join(texts)
+
+    prompt = _summary_prompt(category, user_content)
+
     response = llm_call_fn(prompt)
 
     return response.strip()
@@ -128,27 +162,53 @@ def group_entries(agent_name, entries):
 
 
 
-def generate_category_summary(agent_name, entries, llm_call_fn=None):
+def generate_category_summary(
+    agent_name,
+    entries,
+    llm_call_fn=None,
+    token_budget=None,
+    progress_fn=None,
+    compression_ratio=None,
+    use_summaries=False,
+):
     """
     Generic category summary for all agents.
 
     - Grouping is deterministic
     - Summarization is generative
     - LLM is used ONLY when llm_call_fn is provided (Regenerate)
+    - token_budget caps each category prompt (estimated tokens)
+    - progress_fn(fraction, message) is called once per category
+    - use_summaries: over-budget categories use per-entry micro-summaries
+      for their oldest entries (intelligence/microsummary.py)
     """
 
     groups = group_entries(agent_name, entries)
     print("DEBUG groups:", {k: len(v) for k, v in groups.items()})
     items = []
 
-    for category, evts in groups.items():
-        texts = _collect_raw_text(evts)
+    for i, (category, evts) in enumerate(groups.items()):
+        if progress_fn:
+            progress_fn(i / len(groups), f"Summarizing {category}")
+
+        # repeated observations (chat draft + direct save) add noise, not signal
+        unique = collapse_near_duplicates(evts)
+        if use_summaries and token_budget:
+            texts = entry_texts_within_budget(unique, _content_budget(category, token_budget))
+        else:
+            texts = _collect_raw_text(unique)
         print(f"DEBUG category={category} texts_count={len(texts)}")
         print("DEBUG sample texts:", texts[:2])
 
         if llm_call_fn and texts:
             print("DEBUG calling LLM")
-            content = summarize_with_llm(category, texts, llm_call_fn)
+            content = summarize_with_llm(
+                category,
+                texts,
+                llm_call_fn,
+                token_budget=token_budget,
+                compression_ratio=compression_ratio,
+            )
             print("DEBUG LLM returned:", repr(content[:200]))
         else:
             print("DEBUG skipping LLM")
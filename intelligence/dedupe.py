@@ -0,0 +1,149 @@
+# intelligence/dedupe.py
+
+import hashlib
+from collections import Counter
+from datetime import datetime
+
+from intelligence.text import entry_text, tokenize
+
+SIMHASH_BITS = 64
+
+# Max differing bits for two entries to count as near-duplicates
+DEFAULT_MAX_DISTANCE = 3
+
+# LSH bands: two hashes within DEFAULT_MAX_DISTANCE bits must agree on at
+# least one of (max_distance + 1) bands (pigeonhole), so no pair is missed.
+_BANDS = DEFAULT_MAX_DISTANCE + 1
+
+# The double log we collapse (chat draft + direct save) lands within
+# minutes; the same routine note on different days is real signal
+DUPLICATE_WINDOW_SECONDS = 30 * 60
+
+
+# -------------------------------------------------
+# SimHash
+# -------------------------------------------------
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str) -> str | None:
+    """
+    64-bit SimHash of a text as 16 hex chars (None for empty text).
+    Features: tokens + token bigrams, weighted by frequency.
+    """
+    terms = tokenize(text)
+    if not terms:
+        return None
+
+    features = Counter(terms)
+    features.update(f"{a} {b}" for a, b in zip(terms, terms[1:]))
+
+    weights = [0] * SIMHASH_BITS
+    for feature, weight in features.items():
+        h = _feature_hash(feature)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += weight if (h >> bit) & 1 else -weight
+
+    value = 0
+    for bit, w in enumerate(weights):
+        if w > 0:
+            value |= 1 << bit
+
+    return f"{value:016x}"
+
+
+def hamming(a: str, b: str) -> int:
+    return (int(a, 16) ^ int(b, 16)).bit_count()
+
+
+def entry_simhash(entry) -> str | None:
+    return entry.get("simhash") or simhash(entry_text(entry))
+
+
+# -------------------------------------------------
+# Grouping
+# -------------------------------------------------
+
+def _bands(value: str):
+    # 16 hex chars → split into _BANDS roughly equal slices
+    step = -(-len(value) // _BANDS)
+    return [(i, value[i * step:(i + 1) * step]) for i in range(_BANDS)]
+
+
+def _created_ts(entry):
+    try:
+        return datetime.fromisoformat(entry["created_at"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def find_near_duplicates(
+    entries,
+    max_distance: int = DEFAULT_MAX_DISTANCE,
+    window_seconds: float | None = None,
+):
+    """
+    Group near-duplicate entries.
+
+    - entries: priority order (the first of each group is the one kept)
+    - window_seconds: only entries created at most this far apart match
+      (None → any age; entries without created_at never match)
+    - uses band buckets, so only entries sharing a band are compared
+    Returns [{"keep": entry, "duplicates": [(entry, distance), ...]}]
+    """
+    hashes = [entry_simhash(e) for e in entries]
+    times = [_created_ts(e) for e in entries] if window_seconds is not None else None
+    buckets = {}
+    parent = {}
+    groups = {}
+
+    for i, h in enumerate(hashes):
+        if h is None:
+            continue
+
+        best = None
+        for band in _bands(h):
+            for j in buckets.get(band, ()):
+                if times is not None and (
+                    times[i] is None or times[j] is None
+                    or abs(times[i] - times[j]) > window_seconds
+                ):
+                    continue
+                d = hamming(h, hashes[j])
+                if d <= max_distance and (best is None or d < best[1]):
+                    best = (parent.get(j, j), d)
+
+        if best is not None:
+            root, d = best
+            parent[i] = root
+            groups.setdefault(root, []).append((i, d))
+        else:
+            parent[i] = i
+
+        for band in _bands(h):
+            buckets.setdefault(band, []).append(i)
+
+    return [
+        {
+            "keep": entries[root],
+            "duplicates": [(entries[i], d) for i, d in members],
+        }
+        for root, members in groups.items()
+    ]
+
+
+def collapse_near_duplicates(
+    entries,
+    max_distance: int = DEFAULT_MAX_DISTANCE,
+    window_seconds: float | None = DUPLICATE_WINDOW_SECONDS,
+):
+    """
+    entries minus near-duplicates created within window_seconds of each
+    other (first occurrence wins, order kept).
+    """
+    dropped = set()
+    for group in find_near_duplicates(entries, max_distance, window_seconds):
+        dropped.update(id(e) for e, _ in group["duplicates"])
+    return [e for e in entries if id(e) not in dropped]
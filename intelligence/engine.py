@@ -1,6 +1,13 @@
 # intelligence/engine.py
 
+import logging
+
+from intelligence.extractive import extract_key_sentences
 from intelligence.templates import load_prompt_template
+from intelligence.text import entry_text
+from llm.tokens import pack_texts, remaining_budget
+
+logger = logging.getLogger(__name__)
 
 
 def generate_report(
@@ -59,23 +66,35 @@ def generate_report_content(
     entries: list[dict],
     policy,
     llm_call_fn,
+    token_budget: int | None = None,
+    compression_ratio: float | None = None,
 ):
+    """
+    - entries: newest first; when token_budget is set, the oldest entries
+      that do not fit are left out of the prompt
+    - compression_ratio: extractive pre-summarization (see intelligence/extractive.py)
+    """
 
     template = load_prompt_template(agent_name, report_type)
-    def _entry_to_text(e: dict) -> str:
-        if "text" in e and e["text"]:
-            return e["text"]
-        if "content" in e and isinstance(e["content"], str):
-            return e["content"]
-        return ""
+    texts = [t for t in (entry_text(e) for e in entries) if t]
 
-    user_content = template.format(
-        entries="\n".join(
-            f"- {_entry_to_text(e)}"
-            for e in entries
-            if _entry_to_text(e)
+    if compression_ratio:
+        texts = extract_key_sentences(texts, ratio=compression_ratio)
+
+    lines = [f"- {t}" for t in texts]
+
+    if token_budget:
+        budget = remaining_budget(
+            token_budget,
+            template,
+            policy.system_prompt,
+            policy.developer_prompt,
         )
-    )
+        lines, stats = pack_texts(lines, budget)
+        if stats["truncated"]:
+            logger.info("%s/%s prompt truncated: %s", agent_name, report_type, stats)
+
+    user_content = template.format(entries="\n".join(lines))
 
     return llm_call_fn(
         system_prompt=policy.system_prompt,
@@ -88,12 +107,16 @@ def generate_report_content(
 from intelligence.storage import save_report
 from datetime import datetime
 
-def persist_report(agent_name, report_type, content):
+def persist_report(agent_name, report_type, content, fingerprint=None):
+    """
+    - fingerprint: hash of the inputs the report was built from
+    """
     report = {
         "agent": agent_name,
         "type": report_type,
         "content": content,
         "created_at": datetime.utcnow().isoformat(),
+        "fingerprint": fingerprint,
     }
     save_report(report)
     return report
@@ -0,0 +1,149 @@
+# intelligence/extractive.py
+
+import math
+import re
+from collections import Counter
+
+from intelligence.text import tokenize
+
+# Split after Latin or CJK sentence punctuation, or on line breaks
+_SENTENCE_RE = re.compile(r"(?<=[.!?。！？；;])\s*|\n+")
+
+# Below this many sentences the input is passed through untouched
+MIN_SENTENCES = 12
+
+# TextRank is O(n²) in sentences; above this, rank by centroid similarity
+MAX_TEXTRANK_SENTENCES = 400
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(text or "") if s and s.strip()]
+
+
+# -------------------------------------------------
+# TF-IDF vectors
+# -------------------------------------------------
+
+def _tfidf_vectors(sentences):
+    term_lists = [tokenize(s) for s in sentences]
+    df = Counter()
+    for terms in term_lists:
+        df.update(set(terms))
+
+    n = len(sentences)
+    vectors = []
+    for terms in term_lists:
+        tf = Counter(terms)
+        vec = {t: c * math.log(1 + n / df[t]) for t, c in tf.items()}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        vectors.append({t: v / norm for t, v in vec.items()})
+
+    return vectors
+
+
+def _cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(t, 0.0) for t, v in a.items())
+
+
+# -------------------------------------------------
+# Ranking
+# -------------------------------------------------
+
+def _textrank(vectors, damping=0.85, iterations=30, tol=1e-6):
+    n = len(vectors)
+
+    # inverted index → only sentence pairs that share a term are compared
+    by_term = {}
+    for i, vec in enumerate(vectors):
+        for t in vec:
+            by_term.setdefault(t, []).append(i)
+
+    neighbors = [dict() for _ in range(n)]
+    for i, vec in enumerate(vectors):
+        for t, v in vec.items():
+            for j in by_term[t]:
+                if j > i:
+                    neighbors[i][j] = neighbors[i].get(j, 0.0) + v * vectors[j][t]
+
+    for i in range(n):
+        for j, w in neighbors[i].items():
+            if j > i:
+                neighbors[j][i] = w
+
+    out_sum = [sum(nb.values()) or 1.0 for nb in neighbors]
+    # incoming edges pre-divided by the source's out weight
+    incoming = [[(j, w / out_sum[j]) for j, w in nb.items()] for nb in neighbors]
+
+    scores = [1.0 / n] * n
+    base = (1 - damping) / n
+
+    for _ in range(iterations):
+        new = [
+            base + damping * sum(w * scores[j] for j, w in edges)
+            for edges in incoming
+        ]
+        delta = sum(abs(a - b) for a, b in zip(new, scores))
+        scores = new
+        if delta < tol:
+            break
+
+    return scores
+
+
+def _centroid_scores(vectors):
+    centroid = Counter()
+    for vec in vectors:
+        centroid.update(vec)
+    return [_cosine(vec, centroid) for vec in vectors]
+
+
+def rank_sentences(sentences):
+    vectors = _tfidf_vectors(sentences)
+    if len(sentences) > MAX_TEXTRANK_SENTENCES:
+        return _centroid_scores(vectors)
+    return _textrank(vectors)
+
+
+# -------------------------------------------------
+# Public API
+# -------------------------------------------------
+
+def extract_key_sentences(texts, ratio: float = 0.5, min_sentences: int = MIN_SENTENCES):
+    """
+    Deterministic extractive compression of a list of notes.
+
+    - keeps ~ratio of the sentences (at least min_sentences)
+    - sentences keep their original order
+    - exact duplicate sentences are dropped first
+    Returns a list of texts (one per original note that kept a sentence).
+    """
+    if ratio is None or ratio >= 1:
+        return list(texts)
+
+    # (note index, sentence) in reading order
+    items = []
+    seen = set()
+    for i, text in enumerate(texts):
+        for sentence in split_sentences(text):
+            key = sentence.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            items.append((i, sentence))
+
+    if len(items) <= min_sentences:
+        return list(texts)
+
+    keep = max(min_sentences, math.ceil(len(items) * ratio))
+    scores = rank_sentences([s for _, s in items])
+
+    top = sorted(range(len(items)), key=lambda k: (-scores[k], k))[:keep]
+
+    per_note = {}
+    for k in sorted(top):
+        note_idx, sentence = items[k]
+        per_note.setdefault(note_idx, []).append(sentence)
+
+    return [" ".join(per_note[i]) for i in sorted(per_note)]
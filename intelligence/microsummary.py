@@ -0,0 +1,99 @@
+# intelligence/microsummary.py
+
+import logging
+
+from agents.common.storage import get_entries_without_summary, set_entry_summaries
+from intelligence.text import entry_text
+from llm.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Entries at or below this many estimated tokens are their own summary
+SHORT_ENTRY_TOKENS = 40
+
+# Entries summarized per pass of summarize_pending_entries
+BATCH_SIZE = 50
+
+
+def _summary_prompt(text: str) -> str:
+    return f"""
+Condense the note below into ONE line of at most 25 words.
+
+RULES:
+- Write in the SAME LANGUAGE as the note.
+- Keep names, dates, amounts and other concrete details.
+- Do NOT add anything that is not in the note.
+- Output only the line, no prefix or quotes.
+
+NOTE:
+{text}
+"""
+
+
+def summarize_entry(text: str, llm_call_fn) -> str:
+    if estimate_tokens(text) <= SHORT_ENTRY_TOKENS:
+        return text
+
+    line = llm_call_fn(_summary_prompt(text)).strip()
+    # keep the first line only; fall back to the note if the model returned nothing
+    return line.splitlines()[0].strip() if line else text
+
+
+def summarize_pending_entries(agent: str, llm_call_fn, progress_fn=None):
+    """
+    Compute micro-summaries for every entry of an agent that lacks one
+    (new entries, or entries edited since their summary was made).
+    Returns the number of summaries stored.
+    """
+    stored = 0
+
+    while True:
+        entries = get_entries_without_summary(agent, limit=BATCH_SIZE)
+        if not entries:
+            break
+
+        updates = []
+        for e in entries:
+            text = entry_text(e)
+            updates.append((summarize_entry(text, llm_call_fn) if text else "", e["id"], e["updated_at"]))
+
+        written = set_entry_summaries(updates)
+        stored += written
+        if progress_fn:
+            progress_fn(0.0, f"{stored} entries summarized")
+
+        # rows edited mid-pass come back next round; stop if nothing stuck
+        if not written:
+            break
+
+    return stored
+
+
+def entry_texts_within_budget(entries, budget: int):
+    """
+    One text per entry (entries newest first), at most ~budget tokens
+    when micro-summaries allow it.
+
+    - everything fits → full texts, unchanged
+    - otherwise the oldest entries switch to their micro-summary first,
+      until the total fits; entries without a summary keep full text
+    Any remaining overflow is left to pack_texts downstream.
+    """
+    texts = [entry_text(e) for e in entries]
+    total = sum(estimate_tokens(t) for t in texts)
+
+    if total > budget:
+        swapped = 0
+        for i in range(len(entries) - 1, -1, -1):
+            summary = entries[i].get("summary")
+            if summary is None:
+                continue
+            total += estimate_tokens(summary) - estimate_tokens(texts[i])
+            texts[i] = summary
+            swapped += 1
+            if total <= budget:
+                break
+
+        logger.info("Using %d micro-summaries to fit %d-token budget", swapped, budget)
+
+    return [t for t in texts if t]
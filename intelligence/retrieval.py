@@ -0,0 +1,193 @@
+# intelligence/retrieval.py
+
+import heapq
+import math
+import threading
+from collections import Counter, defaultdict
+
+from agents.common.storage import get_entries_changed_since
+from intelligence.text import entry_text, tokenize
+from llm.tokens import pack_texts
+
+
+# -------------------------------------------------
+# BM25 index
+# -------------------------------------------------
+
+class BM25Index:
+    """
+    In-memory BM25 index with incremental add / remove.
+
+    - postings: term -> {doc_id: term frequency}
+    - scores only touch postings of the query terms
+    - per-doc length norms are cached and only recomputed when the
+      average document length drifts by more than NORM_DRIFT
+    """
+
+    # Terms in more than this share of docs carry almost no signal
+    # (idf ≈ 0) but cost a full postings scan, so they are skipped.
+    MAX_DF_RATIO = 0.5
+    NORM_DRIFT = 0.05
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)
+        self.doc_terms = {}     # doc_id -> Counter (needed for removal)
+        self.doc_len = {}
+        self.total_len = 0
+        self._norms = {}
+        self._norm_avgdl = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    def _norm(self, length, avgdl):
+        return self.k1 * (1 - self.b + self.b * length / avgdl)
+
+    def add(self, doc_id, text: str):
+        with self._lock:
+            if doc_id in self.doc_len:
+                self.remove(doc_id)
+
+            counts = Counter(tokenize(text))
+            for term, tf in counts.items():
+                self.postings[term][doc_id] = tf
+
+            length = sum(counts.values())
+            self.doc_terms[doc_id] = counts
+            self.doc_len[doc_id] = length
+            self.total_len += length
+            if self._norm_avgdl:
+                self._norms[doc_id] = self._norm(length, self._norm_avgdl)
+
+    def remove(self, doc_id):
+        with self._lock:
+            counts = self.doc_terms.pop(doc_id, None)
+            if counts is None:
+                return
+
+            for term in counts:
+                docs = self.postings.get(term)
+                if docs is not None:
+                    docs.pop(doc_id, None)
+                    if not docs:
+                        del self.postings[term]
+
+            self.total_len -= self.doc_len.pop(doc_id)
+            self._norms.pop(doc_id, None)
+
+    def _current_norms(self, avgdl):
+        if (
+            self._norm_avgdl is None
+            or abs(avgdl - self._norm_avgdl) > self.NORM_DRIFT * self._norm_avgdl
+        ):
+            self._norm_avgdl = avgdl
+            self._norms = {
+                doc_id: self._norm(length, avgdl)
+                for doc_id, length in self.doc_len.items()
+            }
+        return self._norms
+
+    def search(self, query: str, k: int = 10):
+        """
+        Returns [(doc_id, score)] best first, at most k.
+        """
+        with self._lock:
+            n = len(self.doc_len)
+            if n == 0:
+                return []
+
+            avgdl = self.total_len / n or 1.0
+            norms = self._current_norms(avgdl)
+            k1_plus_1 = self.k1 + 1
+            # small corpora: every term matters
+            max_df = int(n * self.MAX_DF_RATIO) if n >= 100 else n
+            scores = defaultdict(float)
+
+            for term in set(tokenize(query)):
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+
+                df = len(docs)
+                if df > max_df:
+                    continue
+
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+                for doc_id, tf in docs.items():
+                    scores[doc_id] += idf * tf * k1_plus_1 / (tf + norms[doc_id])
+
+        if not scores:
+            return []
+
+        if len(scores) <= k:
+            return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+
+        return heapq.nlargest(k, scores.items(), key=lambda x: x[1])
+
+
+# -------------------------------------------------
+# Per-agent entry indexes
+# -------------------------------------------------
+
+class EntryIndex:
+    """
+    BM25 index over one agent's entries, kept current by pulling rows
+    changed since the last refresh (no full rebuilds).
+    """
+
+    def __init__(self, agent: str):
+        self.agent = agent
+        self.index = BM25Index()
+        self.texts = {}
+        self.watermark = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with self._lock:
+            for entry in get_entries_changed_since(self.agent, self.watermark):
+                if entry.get("deleted"):
+                    self.index.remove(entry["id"])
+                    self.texts.pop(entry["id"], None)
+                else:
+                    text = entry_text(entry)
+                    self.index.add(entry["id"], text)
+                    self.texts[entry["id"]] = text
+
+                if entry.get("updated_at"):
+                    self.watermark = max(self.watermark or "", entry["updated_at"])
+
+    def search(self, query: str, k: int = 10):
+        self.refresh()
+        return [
+            (doc_id, score, self.texts.get(doc_id, ""))
+            for doc_id, score in self.index.search(query, k)
+        ]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_entry_index(agent: str) -> EntryIndex:
+    with _indexes_lock:
+        if agent not in _indexes:
+            _indexes[agent] = EntryIndex(agent)
+        return _indexes[agent]
+
+
+def retrieve_relevant_texts(agent: str, query: str, *, k: int = 8, token_budget: int = None):
+    """
+    Top-k entry texts for `query`, best first, packed into token_budget.
+    """
+    hits = get_entry_index(agent).search(query, k)
+    texts = [text for _, _, text in hits if text]
+
+    if token_budget is None:
+        return texts
+
+    texts, _ = pack_texts(texts, token_budget)
+    return texts
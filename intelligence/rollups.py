@@ -0,0 +1,284 @@
+# intelligence/rollups.py
+
+import logging
+from datetime import date, datetime, timedelta
+
+from agents.common.storage import get_entries_between, get_entries_fingerprint
+from intelligence.dedupe import collapse_near_duplicates
+from intelligence.extractive import extract_key_sentences
+from intelligence.microsummary import entry_texts_within_budget
+from intelligence.singleflight import SingleFlight
+from intelligence.text import entry_text
+from intelligence.storage import get_conn
+from llm.tokens import pack_texts
+
+logger = logging.getLogger(__name__)
+
+# Max estimated tokens of one day's raw notes sent to the digest prompt
+DIGEST_INPUT_TOKENS = 6000
+
+# Days are UTC calendar days (entries.created_at is UTC)
+
+# Weekly, monthly and daily_digest jobs of one agent run on different
+# workers and cover overlapping days; a day being digested by one of
+# them is waited for, not digested again
+DIGEST_FLIGHTS = SingleFlight()
+
+
+# -------------------------------------------------
+# Storage
+# -------------------------------------------------
+
+def init_db():
+    conn = get_conn()
+    cur = conn.cursor()
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS daily_digests (
+        agent TEXT,
+        day TEXT,
+        content TEXT,
+        entry_count INTEGER,
+        fingerprint TEXT,
+        created_at TEXT,
+        PRIMARY KEY (agent, day)
+    )
+    """)
+
+    conn.commit()
+    conn.close()
+
+
+def _row_to_digest(r):
+    return {
+        "agent": r[0],
+        "day": r[1],
+        "content": r[2],
+        "entry_count": r[3],
+        "fingerprint": r[4],
+        "created_at": r[5],
+    }
+
+
+def get_digests(agent: str, start_day: date, end_day: date):
+    """
+    Stored digests with start_day <= day <= end_day, oldest first.
+    """
+    conn = get_conn()
+    rows = conn.execute("""
+        SELECT agent, day, content, entry_count, fingerprint, created_at
+        FROM daily_digests
+        WHERE agent = ? AND day >= ? AND day <= ?
+        ORDER BY day
+    """, (agent, start_day.isoformat(), end_day.isoformat())).fetchall()
+    conn.close()
+
+    return [_row_to_digest(r) for r in rows]
+
+
+def _save_digest(digest):
+    conn = get_conn()
+    conn.execute("""
+        INSERT OR REPLACE INTO daily_digests
+        (agent, day, content, entry_count, fingerprint, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (
+        digest["agent"],
+        digest["day"],
+        digest["content"],
+        digest["entry_count"],
+        digest["fingerprint"],
+        digest["created_at"],
+    ))
+    conn.commit()
+    conn.close()
+
+
+def _delete_digest(agent, day: date):
+    conn = get_conn()
+    conn.execute(
+        "DELETE FROM daily_digests WHERE agent = ? AND day = ?",
+        (agent, day.isoformat()),
+    )
+    conn.commit()
+    conn.close()
+
+
+# -------------------------------------------------
+# Daily digests
+# -------------------------------------------------
+
+def _day_bounds(day: date):
+    start = datetime.combine(day, datetime.min.time())
+    return start.isoformat(), (start + timedelta(days=1)).isoformat()
+
+
+def _digest_prompt(day: date, notes: str) -> str:
+    return f"""
+You are writing a compact digest of the notes recorded on {day.isoformat()}.
+The digest will later be combined with other days into weekly and monthly reflections.
+
+RULES:
+- Write in the SAME LANGUAGE as the notes.
+- Use ONLY the provided content. Do NOT invent facts or give advice.
+- Keep names, dates, amounts and other concrete details.
+- Merge repeated points into one.
+
+OUTPUT FORMAT:
+- 3–6 bullet points, at most 120 words in total.
+- No headings, no introduction.
+
+NOTES:
+{notes}
+"""
+
+
+def build_daily_digest(
+    agent: str,
+    day: date,
+    llm_call_fn,
+    *,
+    existing: dict = None,
+    compression_ratio: float | None = None,
+    use_summaries: bool = False,
+):
+    """
+    Digest one closed day. Returns the stored digest, or None for a day
+    without entries.
+
+    - existing: the stored digest for this day, if any; it is reused as
+      long as the day's entries are unchanged (same fingerprint)
+    - llm_call_fn: function(prompt) -> text
+    - use_summaries: a day over DIGEST_INPUT_TOKENS uses per-entry
+      micro-summaries for its oldest entries
+    """
+    start, end = _day_bounds(day)
+    fingerprint = get_entries_fingerprint(agent, start=start, end=end)
+
+    if existing and existing["fingerprint"] == fingerprint:
+        return existing
+
+    digest, shared = DIGEST_FLIGHTS.do(
+        (agent, day, fingerprint),
+        lambda: _build_digest(agent, day, fingerprint, llm_call_fn, existing, compression_ratio, use_summaries),
+    )
+    if shared:
+        logger.info("%s digest for %s coalesced with in-flight build", agent, day)
+    return digest
+
+
+def _build_digest(agent, day, fingerprint, llm_call_fn, existing, compression_ratio, use_summaries):
+    start, end = _day_bounds(day)
+    entries = get_entries_between(agent, start, end)
+    if not entries:
+        # every entry of the day was deleted since the digest was built
+        if existing:
+            _delete_digest(agent, day)
+        return None
+
+    # oldest first in storage; newest first from here so cuts hit the oldest
+    unique = collapse_near_duplicates(entries)[::-1]
+    if use_summaries:
+        texts = entry_texts_within_budget(unique, DIGEST_INPUT_TOKENS)
+    else:
+        texts = [t for t in (entry_text(e) for e in unique) if t]
+
+    if compression_ratio:
+        texts = extract_key_sentences(texts, ratio=compression_ratio)
+
+    texts, stats = pack_texts(texts, DIGEST_INPUT_TOKENS)
+    if stats["truncated"]:
+        logger.info("%s digest for %s truncated: %s", agent, day, stats)
+
+    content = llm_call_fn(_digest_prompt(day, "\n".join(f"- {t}" for t in texts[::-1])))
+
+    digest = {
+        "agent": agent,
+        "day": day.isoformat(),
+        "content": content.strip(),
+        "entry_count": len(entries),
+        "fingerprint": fingerprint,
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    _save_digest(digest)
+    return digest
+
+
+def ensure_daily_digests(
+    agent: str,
+    start_day: date,
+    end_day: date,
+    llm_call_fn,
+    *,
+    compression_ratio: float | None = None,
+    use_summaries: bool = False,
+    progress_fn=None,
+):
+    """
+    Build missing or stale digests for every day in [start_day, end_day].
+    Unchanged days cost one fingerprint query and no LLM call.
+    Returns digests oldest first (days without entries are skipped).
+    """
+    stored = {d["day"]: d for d in get_digests(agent, start_day, end_day)}
+    days = [start_day + timedelta(days=i) for i in range((end_day - start_day).days + 1)]
+
+    digests = []
+    for i, day in enumerate(days):
+        if progress_fn:
+            progress_fn(i / len(days), f"Digesting {day.isoformat()}")
+
+        digest = build_daily_digest(
+            agent,
+            day,
+            llm_call_fn,
+            existing=stored.get(day.isoformat()),
+            compression_ratio=compression_ratio,
+            use_summaries=use_summaries,
+        )
+        if digest:
+            digests.append(digest)
+
+    return digests
+
+
+# -------------------------------------------------
+# Period inputs (weekly / monthly reflections)
+# -------------------------------------------------
+
+def period_entries(
+    agent: str,
+    days: int,
+    llm_call_fn,
+    *,
+    today: date = None,
+    compression_ratio: float | None = None,
+    use_summaries: bool = False,
+    progress_fn=None,
+):
+    """
+    Report inputs covering the last `days` days, newest first:
+    - one digest per closed day, as {"text": "[YYYY-MM-DD] ..."}
+    - today's raw entries (the day has not closed yet)
+
+    Shape matches what generate_report_content expects.
+    """
+    today = today or datetime.utcnow().date()
+
+    digests = ensure_daily_digests(
+        agent,
+        today - timedelta(days=days - 1),
+        today - timedelta(days=1),
+        llm_call_fn,
+        compression_ratio=compression_ratio,
+        use_summaries=use_summaries,
+        progress_fn=progress_fn,
+    )
+
+    texts = [entry_text(e) for e in get_entries_between(agent, *_day_bounds(today))]
+    texts = [t for t in texts if t]
+    if compression_ratio:
+        texts = extract_key_sentences(texts, ratio=compression_ratio)
+
+    items = [{"text": f"[{today.isoformat()}] {t}"} for t in reversed(texts)]
+    items += [{"text": f"[{d['day']}] {d['content']}"} for d in reversed(digests)]
+    return items
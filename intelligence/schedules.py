@@ -0,0 +1,281 @@
+# intelligence/schedules.py
+
+import hashlib
+import logging
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from intelligence.storage import get_conn
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------------------------
+# Cron specs
+# -------------------------------------------------
+
+def _parse_field(field: str, lo: int, hi: int) -> set[int]:
+    values = set()
+
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_str = part.split("/", 1)
+            step = int(step_str)
+
+        if part == "*":
+            start, end = lo, hi
+        elif "-" in part:
+            start_str, end_str = part.split("-", 1)
+            start, end = int(start_str), int(end_str)
+        else:
+            start = end = int(part)
+
+        if start < lo or end > hi or start > end or step < 1:
+            raise ValueError(f"Invalid cron field: {field!r}")
+
+        values.update(range(start, end + 1, step))
+
+    return values
+
+
+class CronSpec:
+    """
+    Standard 5-field cron: minute hour day-of-month month day-of-week.
+
+    Supports *, lists (1,15), ranges (1-5) and steps (*/10).
+    Day-of-week: 0 = Sunday … 6 = Saturday (7 is accepted as Sunday).
+    As in cron, when both day-of-month and day-of-week are restricted
+    (neither starts with *), a day matching EITHER fires: "0 9 1 * 1"
+    runs on the 1st and on every Monday.
+    """
+
+    def __init__(self, spec: str):
+        fields = spec.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron spec needs 5 fields: {spec!r}")
+
+        self.spec = spec
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12)
+        self.weekdays = {d % 7 for d in _parse_field(fields[4], 0, 7)}
+        self.days_or_weekdays = not fields[2].startswith("*") and not fields[4].startswith("*")
+
+    def _day_matches(self, dt: datetime) -> bool:
+        if dt.month not in self.months:
+            return False
+
+        # datetime.weekday(): Monday = 0 → cron: Sunday = 0
+        day = dt.day in self.days
+        weekday = (dt.weekday() + 1) % 7 in self.weekdays
+        return (day or weekday) if self.days_or_weekdays else (day and weekday)
+
+    def next_after(self, dt: datetime) -> datetime:
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 5)
+
+        while t < limit:
+            if not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+                continue
+            if t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+                continue
+            return t
+
+        raise ValueError(f"Cron spec never fires: {self.spec!r}")
+
+
+# -------------------------------------------------
+# Schedules + persisted state
+# -------------------------------------------------
+
+@dataclass
+class ReportSchedule:
+    agent: str
+    report_type: str
+    cron: str
+    # Spread runs over this many seconds after the cron time
+    jitter_seconds: int = 600
+
+    @property
+    def key(self) -> str:
+        return f"{self.agent}:{self.report_type}"
+
+    def next_run_after(self, dt: datetime) -> datetime:
+        # Stable per-schedule jitter, so agents don't all fire at the same second
+        digest = hashlib.sha1(f"{self.key}:{dt.date()}".encode("utf-8")).digest()
+        jitter = int.from_bytes(digest[:4], "big") % (self.jitter_seconds + 1)
+        return CronSpec(self.cron).next_after(dt) + timedelta(seconds=jitter)
+
+
+def init_db():
+    conn = get_conn()
+    cur = conn.cursor()
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS schedule_state (
+        key TEXT PRIMARY KEY,
+        last_run_at TEXT,
+        next_run_at TEXT
+    )
+    """)
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS scheduler_lock (
+        name TEXT PRIMARY KEY,
+        owner TEXT,
+        expires_at REAL
+    )
+    """)
+
+    conn.commit()
+    conn.close()
+
+
+def get_schedule_state():
+    conn = get_conn()
+    rows = conn.execute(
+        "SELECT key, last_run_at, next_run_at FROM schedule_state"
+    ).fetchall()
+    conn.close()
+
+    return {
+        r[0]: {"last_run_at": r[1], "next_run_at": r[2]}
+        for r in rows
+    }
+
+
+def _set_schedule_state(key, last_run_at, next_run_at):
+    conn = get_conn()
+    conn.execute("""
+        INSERT INTO schedule_state (key, last_run_at, next_run_at)
+        VALUES (?, ?, ?)
+        ON CONFLICT(key) DO UPDATE SET
+            last_run_at = COALESCE(excluded.last_run_at, last_run_at),
+            next_run_at = excluded.next_run_at
+    """, (key, last_run_at, next_run_at))
+    conn.commit()
+    conn.close()
+
+
+def acquire_lock(name: str, owner: str, ttl_seconds: float) -> bool:
+    """
+    Lease-based lock shared by every process using the intelligence DB.
+    Re-acquiring an owned (or expired) lease extends it.
+    """
+    now = time.time()
+
+    conn = get_conn()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT owner, expires_at FROM scheduler_lock WHERE name = ?",
+            (name,),
+        ).fetchone()
+
+        if row and row[0] != owner and row[1] > now:
+            conn.commit()
+            return False
+
+        conn.execute("""
+            INSERT INTO scheduler_lock (name, owner, expires_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                owner = excluded.owner,
+                expires_at = excluded.expires_at
+        """, (name, owner, now + ttl_seconds))
+        conn.commit()
+        return True
+    finally:
+        conn.close()
+
+
+# -------------------------------------------------
+# Scheduler
+# -------------------------------------------------
+
+class ReportScheduler:
+    """
+    In-process scheduler for report precomputation.
+
+    - schedules: list[ReportSchedule]
+    - run_fn(agent, report_type): queues the work (must not block)
+    - is_idle(): optional; due runs wait until it returns True
+    Only the process holding the 'report_scheduler' lease fires runs.
+    """
+
+    LOCK_NAME = "report_scheduler"
+
+    def __init__(self, schedules, run_fn, *, is_idle=None, tick_seconds: float = 30):
+        self.schedules = list(schedules)
+        self.run_fn = run_fn
+        self.is_idle = is_idle
+        self.tick_seconds = tick_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._thread = None
+
+    def tick(self, now: datetime = None):
+        """
+        Fire every due schedule once. Returns the keys that ran.
+        """
+        if not acquire_lock(self.LOCK_NAME, self.owner, self.tick_seconds * 3):
+            return []
+
+        now = now or datetime.now()
+        state = get_schedule_state()
+        fired = []
+
+        for sched in self.schedules:
+            next_run_at = state.get(sched.key, {}).get("next_run_at")
+
+            if next_run_at is None:
+                _set_schedule_state(sched.key, None, sched.next_run_after(now).isoformat())
+                continue
+
+            if now < datetime.fromisoformat(next_run_at):
+                continue
+
+            if self.is_idle and not self.is_idle():
+                continue
+
+            try:
+                self.run_fn(sched.agent, sched.report_type)
+            except Exception:
+                logger.exception("Scheduled %s failed to start", sched.key)
+
+            _set_schedule_state(sched.key, now.isoformat(), sched.next_run_after(now).isoformat())
+            fired.append(sched.key)
+
+        return fired
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Report scheduler tick failed")
+            self._stop.wait(self.tick_seconds)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        init_db()
+        self._thread = threading.Thread(target=self._loop, name="report-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.tick_seconds)
+            self._thread = None
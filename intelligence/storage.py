@@ -1,16 +1,26 @@
 # intelligence/storage.py
 
+import json
 import sqlite3
+from datetime import datetime
 from pathlib import Path
 
 DB_PATH = Path("data/intelligence.db")
 DB_PATH.parent.mkdir(exist_ok=True)
 
+# Keep the newest N reports per (agent, type); older ones are pruned on save
+REPORT_RETENTION = 20
+
 
 def get_conn():
     return sqlite3.connect(DB_PATH)
 
 
+def _column_exists(cur, table, column):
+    cur.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in cur.fetchall())
+
+
 def init_db():
     conn = get_conn()
     cur = conn.cursor()
@@ -25,82 +35,190 @@ def init_db():
     )
     """)
 
+    # 'json' | 'text' — NULL for rows written before this column existed
+    if not _column_exists(cur, "reports", "content_format"):
+        cur.execute("ALTER TABLE reports ADD COLUMN content_format TEXT")
+
+    # inputs fingerprint the report was built from (NULL → unknown)
+    if not _column_exists(cur, "reports", "fingerprint"):
+        cur.execute("ALTER TABLE reports ADD COLUMN fingerprint TEXT")
+
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_reports_agent_type_created
+    ON reports (agent, type, created_at DESC, id DESC)
+    """)
+
     conn.commit()
     conn.close()
 
 
-def save_report(report: dict):
+def save_report(report: dict, retention: int = REPORT_RETENTION):
     conn = get_conn()
     cur = conn.cursor()
 
     content = report["content"]
+    content_format = "text"
     if not isinstance(content, str):
         content = json.dumps(content, ensure_ascii=False)
+        content_format = "json"
 
     cur.execute("""
-        INSERT INTO reports (agent, type, content, created_at)
-        VALUES (?, ?, ?, ?)
+        INSERT INTO reports (agent, type, content, created_at, content_format, fingerprint)
+        VALUES (?, ?, ?, ?, ?, ?)
     """, (
         report["agent"],
         report["type"],
         content,
         report["created_at"],
+        content_format,
+        report.get("fingerprint"),
     ))
 
+    if retention:
+        _prune(cur, report["agent"], report["type"], retention)
+
     conn.commit()
     conn.close()
 
 
-import json
+# -------------------------------------------------
+# Read
+# -------------------------------------------------
+
+_REPORT_COLUMNS = "id, agent, type, content, created_at, content_format, fingerprint"
+
+
+def _row_to_report(r):
+    raw_content, content_format = r[3], r[5]
+
+    # -----------------------------------------
+    # Deserialize JSON content
+    # -----------------------------------------
+    content = raw_content
+    if content_format == "json" or (content_format is None and isinstance(raw_content, str)):
+        try:
+            content = json.loads(raw_content)
+        except Exception:
+            # Not JSON → keep as plain string (LLM output)
+            content = raw_content
+
+    return {
+        "id": r[0],
+        "agent": r[1],
+        "type": r[2],
+        "content": content,
+        "created_at": r[4],
+        "fingerprint": r[6],
+    }
+
+
+def _encode_cursor(report) -> str:
+    return f"{report['created_at']}|{report['id']}"
+
+
+class InvalidCursorError(ValueError):
+    pass
 
-def get_reports(agent: str, report_type: str):
-    conn = get_conn()
-    cur = conn.cursor()
+
+def _decode_cursor(cursor: str):
+    created_at, _, report_id = cursor.rpartition("|")
+    try:
+        datetime.fromisoformat(created_at)
+        if not report_id.isdigit():
+            raise ValueError(report_id)
+    except ValueError:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}") from None
+    return created_at, int(report_id)
+
+
+def get_reports_page(agent: str, report_type: str = None, limit: int = 20, cursor: str = None):
+    """
+    Newest-first page of reports.
+
+    - cursor: opaque value from a previous page's next_cursor
+      (InvalidCursorError if it is not one)
+    Returns {"reports": [...], "next_cursor": str | None}
+    """
+    query = f"SELECT {_REPORT_COLUMNS} FROM reports WHERE agent = ?"
+    params = [agent]
 
     if report_type:
-        cur.execute("""
-            SELECT id, agent, type, content, created_at
-            FROM reports
-            WHERE agent = ? AND type = ?
-            ORDER BY created_at DESC
-        """, (agent, report_type))
-    else:
-        cur.execute("""
-            SELECT id, agent, type, content, created_at
-            FROM reports
-            WHERE agent = ?
-            ORDER BY created_at DESC
-        """, (agent,))
-
-    rows = cur.fetchall()
+        query += " AND type = ?"
+        params.append(report_type)
+
+    if cursor:
+        query += " AND (created_at, id) < (?, ?)"
+        params.extend(_decode_cursor(cursor))
+
+    query += " ORDER BY created_at DESC, id DESC"
+
+    if limit:
+        # one extra row tells us whether another page exists
+        query += " LIMIT ?"
+        params.append(limit + 1)
+
+    conn = get_conn()
+    rows = conn.execute(query, params).fetchall()
     conn.close()
 
-    results = []
-    for r in rows:
-        raw_content = r[3]
+    reports = [_row_to_report(r) for r in (rows[:limit] if limit else rows)]
+    next_cursor = None
+    if limit and len(rows) > limit:
+        next_cursor = _encode_cursor(reports[-1])
 
-        # -----------------------------------------
-        # Attempt to deserialize JSON content
-        # -----------------------------------------
-        content = raw_content
-        if isinstance(raw_content, str):
-            try:
-                content = json.loads(raw_content)
-            except Exception:
-                # Not JSON → keep as plain string (LLM output)
-                content = raw_content
+    return {"reports": reports, "next_cursor": next_cursor}
 
-        results.append({
-            "id": r[0],
-            "agent": r[1],
-            "type": r[2],
-            "content": content,
-            "created_at": r[4],
-        })
 
-    return results
+def get_reports(agent: str, report_type: str, limit: int = None, cursor: str = None):
+    return get_reports_page(agent, report_type, limit=limit, cursor=cursor)["reports"]
 
 
+def get_latest_report(agent: str, report_type: str):
+    """
+    Single index seek on (agent, type, created_at).
+    """
+    conn = get_conn()
+    row = conn.execute(f"""
+        SELECT {_REPORT_COLUMNS}
+        FROM reports
+        WHERE agent = ? AND type = ?
+        ORDER BY created_at DESC, id DESC
+        LIMIT 1
+    """, (agent, report_type)).fetchone()
+    conn.close()
+
+    return _row_to_report(row) if row else None
+
+
+# -------------------------------------------------
+# Retention
+# -------------------------------------------------
+
+def _prune(cur, agent, report_type, keep):
+    cur.execute("""
+        DELETE FROM reports
+        WHERE agent = ? AND type = ?
+          AND id NOT IN (
+              SELECT id FROM reports
+              WHERE agent = ? AND type = ?
+              ORDER BY created_at DESC, id DESC
+              LIMIT ?
+          )
+    """, (agent, report_type, agent, report_type, keep))
+    return cur.rowcount
+
+
+def prune_reports(agent: str, report_type: str, keep: int = REPORT_RETENTION):
+    """
+    Delete all but the newest `keep` reports of one type.
+    Returns the number of rows deleted.
+    """
+    conn = get_conn()
+    deleted = _prune(conn.cursor(), agent, report_type, keep)
+    conn.commit()
+    conn.close()
+    return deleted
+
 
 def delete_reports_by_type(agent: str, report_type: str):
     conn = get_conn()
@@ -111,4 +229,3 @@ def delete_reports_by_type(agent: str, report_type: str):
     )
     conn.commit()
     conn.close()
-
@@ -1,16 +1,13 @@
 # intelligence/templates.py
 
-from pathlib import Path
+from agents.common.prompt_registry import agent_prompt_path, load_prompt
 
 
 def load_prompt_template(agent_name: str, report_type: str) -> str:
     """
     Loads a prompt template like:
     agents/ami/prompts/weekly_reflection.txt
-    """
-    path = Path("agents") / agent_name / "prompts" / f"{report_type}.txt"
-
-    if not path.exists():
-        raise FileNotFoundError(f"Missing prompt template: {path}")
 
-    return path.read_text()
+    Served from the shared prompt registry (mtime-validated cache).
+    """
+    return load_prompt(agent_prompt_path(agent_name, report_type))
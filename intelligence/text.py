@@ -0,0 +1,63 @@
+# intelligence/text.py
+
+import re
+
+
+# -------------------------------------------------
+# Tokenization
+# -------------------------------------------------
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CJK_RUN_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+")
+
+# Gendered pronouns are kept: in care notes "he" vs "she" is who the
+# note is about, so they must keep two otherwise-equal notes apart
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from",
+    "has", "have", "i", "in", "is", "it", "its", "me",
+    "my", "of", "on", "or", "so", "that", "the", "their", "them",
+    "this", "to", "was", "we", "were", "what", "when", "with", "you",
+}
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Latin words (lowercased, stopwords removed) + CJK character bigrams.
+    Chinese has no spaces, so bigrams stand in for words.
+    """
+    if not text:
+        return []
+
+    lowered = text.lower()
+    terms = [w for w in _WORD_RE.findall(lowered) if w not in STOPWORDS]
+
+    for run in _CJK_RUN_RE.findall(lowered):
+        if len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+
+    return terms
+
+
+# -------------------------------------------------
+# Entries
+# -------------------------------------------------
+
+def entry_text(entry) -> str:
+    """
+    Plain text of an entry dict:
+    - content as list[str] (storage contract) → lines joined by spaces
+    - else a "text" field (report inputs such as daily digests)
+    - else content as a plain string
+    """
+    content = entry.get("content")
+    if isinstance(content, list):
+        text = " ".join(c for c in content if isinstance(c, str))
+    elif entry.get("text"):
+        text = entry["text"]
+    elif isinstance(content, str):
+        text = content
+    else:
+        text = ""
+    return text.strip()
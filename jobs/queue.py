@@ -0,0 +1,284 @@
+# jobs/queue.py
+
+import hashlib
+import json
+import sqlite3
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+DB_PATH = Path("data/jobs.db")
+DB_PATH.parent.mkdir(exist_ok=True)
+
+ACTIVE_STATUSES = ("pending", "running")
+
+
+def get_conn():
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _column_exists(cur, table, column):
+    cur.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in cur.fetchall())
+
+
+def init_db():
+    conn = get_conn()
+    cur = conn.cursor()
+
+    # WAL lets request threads poll while workers write
+    cur.execute("PRAGMA journal_mode=WAL")
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        agent TEXT,
+        params TEXT,
+        dedupe_key TEXT,
+        status TEXT NOT NULL,
+        progress REAL DEFAULT 0,
+        message TEXT,
+        result TEXT,
+        error TEXT,
+        created_at TEXT,
+        started_at TEXT,
+        finished_at TEXT
+    )
+    """)
+
+    # worker process that claimed a running job, and when it last said
+    # it is still alive (see requeue_stale)
+    if not _column_exists(cur, "jobs", "owner"):
+        cur.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+    if not _column_exists(cur, "jobs", "heartbeat_at"):
+        cur.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at TEXT")
+
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_jobs_status_created
+    ON jobs (status, created_at)
+    """)
+
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_jobs_dedupe
+    ON jobs (dedupe_key, status)
+    """)
+
+    conn.commit()
+    conn.close()
+
+
+def _dedupe_key(kind, agent, params) -> str:
+    raw = json.dumps([kind, agent, params or {}], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+# -------------------------------------------------
+# Write
+# -------------------------------------------------
+
+def enqueue(kind: str, agent: str = None, params: dict = None, dedupe_statuses=ACTIVE_STATUSES):
+    """
+    Queue a job unless an identical one is already pending/running.
+
+    dedupe_statuses=("pending",) for jobs whose result depends on data
+    that may change while one runs (a running sync may already have
+    read past a new edit; a queued one has not started yet).
+    Returns (job_id, created: bool).
+    """
+    key = _dedupe_key(kind, agent, params)
+
+    conn = get_conn()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(f"""
+            SELECT id FROM jobs
+            WHERE dedupe_key = ? AND status IN ({",".join("?" * len(dedupe_statuses))})
+            ORDER BY created_at DESC
+            LIMIT 1
+        """, (key, *dedupe_statuses)).fetchone()
+
+        if row:
+            conn.commit()
+            return row["id"], False
+
+        job_id = str(uuid.uuid4())
+        conn.execute("""
+            INSERT INTO jobs (id, kind, agent, params, dedupe_key, status, created_at)
+            VALUES (?, ?, ?, ?, ?, 'pending', ?)
+        """, (
+            job_id,
+            kind,
+            agent,
+            json.dumps(params or {}, ensure_ascii=False),
+            key,
+            datetime.utcnow().isoformat(),
+        ))
+        conn.commit()
+        return job_id, True
+    finally:
+        conn.close()
+
+
+def claim_next(owner: str = None):
+    """
+    Atomically move the oldest pending job to 'running', owned by owner.
+    Returns the job dict or None.
+    """
+    conn = get_conn()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("""
+            SELECT * FROM jobs
+            WHERE status = 'pending'
+            ORDER BY created_at
+            LIMIT 1
+        """).fetchone()
+
+        if not row:
+            conn.commit()
+            return None
+
+        now = datetime.utcnow().isoformat()
+        conn.execute("""
+            UPDATE jobs
+            SET status = 'running', started_at = ?, owner = ?, heartbeat_at = ?
+            WHERE id = ?
+        """, (now, owner, now, row["id"]))
+        conn.commit()
+
+        job = _row_to_job(row)
+        job["status"] = "running"
+        job["started_at"] = now
+        job["owner"] = owner
+        return job
+    finally:
+        conn.close()
+
+
+def update_progress(job_id: str, progress: float, message: str = None):
+    conn = get_conn()
+    conn.execute(
+        "UPDATE jobs SET progress = ?, message = ? WHERE id = ?",
+        (max(0.0, min(1.0, float(progress))), message, job_id),
+    )
+    conn.commit()
+    conn.close()
+
+
+def complete_job(job_id: str, result, owner: str = None):
+    """
+    Returns False if owner no longer holds the job (it was requeued).
+    """
+    conn = get_conn()
+    cur = conn.execute("""
+        UPDATE jobs
+        SET status = 'done', progress = 1, result = ?, finished_at = ?
+        WHERE id = ? AND (? IS NULL OR owner = ?)
+    """, (
+        json.dumps(result, ensure_ascii=False),
+        datetime.utcnow().isoformat(),
+        job_id,
+        owner,
+        owner,
+    ))
+    conn.commit()
+    conn.close()
+    return cur.rowcount > 0
+
+
+def fail_job(job_id: str, error: str, owner: str = None):
+    """
+    Returns False if owner no longer holds the job (it was requeued).
+    """
+    conn = get_conn()
+    cur = conn.execute("""
+        UPDATE jobs
+        SET status = 'failed', error = ?, finished_at = ?
+        WHERE id = ? AND (? IS NULL OR owner = ?)
+    """, (error, datetime.utcnow().isoformat(), job_id, owner, owner))
+    conn.commit()
+    conn.close()
+    return cur.rowcount > 0
+
+
+def heartbeat(owner: str):
+    """
+    Mark every job owner is running as still alive.
+    """
+    conn = get_conn()
+    conn.execute(
+        "UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND owner = ?",
+        (datetime.utcnow().isoformat(), owner),
+    )
+    conn.commit()
+    conn.close()
+
+
+def requeue_stale(stale_after_seconds: int = 60, is_owner_alive=None):
+    """
+    Put 'running' jobs whose worker died back in the queue:
+    - no heartbeat for stale_after_seconds (any host), or
+    - is_owner_alive(owner) is False (owner known to be gone)
+    Jobs from before heartbeats existed fall back to started_at.
+    Returns the number of jobs requeued.
+    """
+    cutoff = (datetime.utcnow() - timedelta(seconds=stale_after_seconds)).isoformat()
+
+    conn = get_conn()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute("""
+            SELECT id, owner, COALESCE(heartbeat_at, started_at) AS seen_at
+            FROM jobs
+            WHERE status = 'running'
+        """).fetchall()
+
+        stale = [
+            r["id"] for r in rows
+            if r["seen_at"] is None
+            or r["seen_at"] < cutoff
+            or (is_owner_alive and r["owner"] and not is_owner_alive(r["owner"]))
+        ]
+        conn.executemany("""
+            UPDATE jobs
+            SET status = 'pending', started_at = NULL, progress = 0,
+                owner = NULL, heartbeat_at = NULL
+            WHERE id = ? AND status = 'running'
+        """, [(job_id,) for job_id in stale])
+        conn.commit()
+        return len(stale)
+    finally:
+        conn.close()
+
+
+# -------------------------------------------------
+# Read
+# -------------------------------------------------
+
+def get_job(job_id: str):
+    conn = get_conn()
+    row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    conn.close()
+    return _row_to_job(row) if row else None
+
+
+def _row_to_job(row):
+    return {
+        "id": row["id"],
+        "kind": row["kind"],
+        "agent": row["agent"],
+        "params": json.loads(row["params"]) if row["params"] else {},
+        "status": row["status"],
+        "progress": row["progress"] or 0,
+        "message": row["message"],
+        "result": json.loads(row["result"]) if row["result"] else None,
+        "error": row["error"],
+        "created_at": row["created_at"],
+        "started_at": row["started_at"],
+        "finished_at": row["finished_at"],
+        "owner": row["owner"],
+        "heartbeat_at": row["heartbeat_at"],
+    }
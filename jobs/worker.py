@@ -0,0 +1,167 @@
+# jobs/worker.py
+
+import logging
+import os
+import socket
+import threading
+import uuid
+
+from jobs.queue import (
+    claim_next,
+    complete_job,
+    fail_job,
+    heartbeat,
+    requeue_stale,
+    update_progress,
+)
+
+logger = logging.getLogger(__name__)
+
+# kind -> fn(job, progress) -> JSON-serializable result
+HANDLERS = {}
+
+_workers = []
+_wakeup = threading.Event()
+_stop = threading.Event()
+
+# "host:pid:boot" of this process; set by start_workers (after any fork)
+_owner = None
+
+
+def register_handler(kind: str, fn):
+    HANDLERS[kind] = fn
+
+
+def notify():
+    """
+    Wake idle workers right away (called after enqueue).
+    """
+    _wakeup.set()
+
+
+def _new_owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def owner_alive(owner: str) -> bool:
+    """
+    False only when owner is known to be gone: a process on this host
+    that no longer exists, or an earlier boot of a reused pid.
+    Owners on other hosts are judged by their heartbeat alone.
+    """
+    try:
+        host, pid, _boot = owner.rsplit(":", 2)
+        pid = int(pid)
+    except ValueError:
+        return True
+
+    if host != socket.gethostname():
+        return True
+    if pid == os.getpid():
+        return owner == _owner
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def run_job(job):
+    owner = job.get("owner")
+    handler = HANDLERS.get(job["kind"])
+    if handler is None:
+        fail_job(job["id"], f"No handler for job kind: {job['kind']}", owner)
+        return
+
+    def progress(fraction, message=None):
+        update_progress(job["id"], fraction, message)
+
+    try:
+        result = handler(job, progress)
+    except Exception as e:
+        logger.exception("Job %s (%s) failed", job["id"], job["kind"])
+        fail_job(job["id"], str(e), owner)
+        return
+
+    if not complete_job(job["id"], result, owner):
+        logger.warning("Job %s was requeued while running; result dropped", job["id"])
+
+
+def _worker_loop(poll_interval: float):
+    while not _stop.is_set():
+        job = claim_next(_owner)
+        if job is None:
+            _wakeup.wait(poll_interval)
+            _wakeup.clear()
+            continue
+        run_job(job)
+
+
+def _monitor_loop(heartbeat_interval: float, stale_after: float):
+    """
+    Keep this process's running jobs alive and hand jobs of dead
+    workers (crash, restart, other gunicorn worker) back to the queue.
+    """
+    while True:
+        try:
+            heartbeat(_owner)
+            requeued = requeue_stale(stale_after, is_owner_alive=owner_alive)
+            if requeued:
+                logger.info("Requeued %d stale jobs", requeued)
+                notify()
+        except Exception:
+            logger.exception("Job heartbeat failed")
+
+        if _stop.wait(heartbeat_interval):
+            return
+
+
+def start_workers(
+    count: int = 2,
+    poll_interval: float = 2.0,
+    heartbeat_interval: float = 10.0,
+    stale_after: float = 60.0,
+):
+    """
+    Start background worker threads (idempotent per process).
+
+    Running jobs are heartbeated every heartbeat_interval seconds; a
+    running job is requeued once its heartbeat is stale_after seconds
+    old or its worker process is gone.
+    """
+    global _owner
+    if _workers:
+        return
+
+    _owner = _new_owner_id()
+    _stop.clear()
+
+    monitor = threading.Thread(
+        target=_monitor_loop,
+        args=(heartbeat_interval, stale_after),
+        name="job-monitor",
+        daemon=True,
+    )
+    monitor.start()
+    _workers.append(monitor)
+
+    for i in range(count):
+        t = threading.Thread(
+            target=_worker_loop,
+            args=(poll_interval,),
+            name=f"job-worker-{i}",
+            daemon=True,
+        )
+        t.start()
+        _workers.append(t)
+
+
+def stop_workers(timeout: float = 5.0):
+    _stop.set()
+    _wakeup.set()
+    for t in _workers:
+        t.join(timeout)
+    _workers.clear()
@@ -0,0 +1,243 @@
+# llm/backend.py
+
+import hashlib
+import os
+from abc import ABC, abstractmethod
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from llm.metrics import InstrumentedBackend
+from llm.resilience import ResilientBackend
+from llm.tokens import estimate_tokens
+
+DEFAULT_MODEL = "models/gemini-2.5-flash"
+
+
+class LLMBackend(ABC):
+    """
+    What routes and report builders need from a model.
+
+    - generate(prompt, config) -> str
+    - stream(prompt, config)   -> iterator of text chunks
+    - batch(prompts, config)   -> list[str], same order as prompts
+    - generate_with_usage(prompt, config) -> (str, usage dict | None)
+      usage: {"prompt_tokens": int, "response_tokens": int}
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def generate(self, prompt: str, *, config: dict = None) -> str:
+        ...
+
+    def generate_with_usage(self, prompt: str, *, config: dict = None):
+        return self.generate(prompt, config=config), None
+
+    @abstractmethod
+    def stream(self, prompt: str, *, config: dict = None):
+        # Backends without native streaming can return super().stream():
+        # the whole reply as one chunk
+        yield self.generate(prompt, config=config)
+
+    def batch(self, prompts, *, config: dict = None, max_workers: int = 4):
+        prompts = list(prompts)
+        if not prompts:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(prompts))) as pool:
+            return list(pool.map(lambda p: self.generate(p, config=config), prompts))
+
+
+# -------------------------------------------------
+# Gemini
+# -------------------------------------------------
+
+class GeminiBackend(LLMBackend):
+    name = "gemini"
+
+    def __init__(self, api_key: str = None, model: str = DEFAULT_MODEL):
+        self.api_key = api_key
+        self.model = model
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        # Created on first use, not at import time
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from google import genai
+                    self._client = genai.Client(api_key=self.api_key)
+        return self._client
+
+    def generate(self, prompt, *, config=None):
+        return self.generate_with_usage(prompt, config=config)[0]
+
+    def generate_with_usage(self, prompt, *, config=None):
+        response = self.client.models.generate_content(
+            model=self.model,
+            contents=prompt,
+            config=config,
+        )
+
+        usage = None
+        meta = getattr(response, "usage_metadata", None)
+        if meta is not None:
+            usage = {
+                "prompt_tokens": getattr(meta, "prompt_token_count", None),
+                "response_tokens": getattr(meta, "candidates_token_count", None),
+            }
+
+        return (response.text or "").strip(), usage
+
+    def stream(self, prompt, *, config=None):
+        for chunk in self.client.models.generate_content_stream(
+            model=self.model,
+            contents=prompt,
+            config=config,
+        ):
+            if chunk.text:
+                yield chunk.text
+
+
+# -------------------------------------------------
+# Deterministic local fake
+# -------------------------------------------------
+
+class FakeBackend(LLMBackend):
+    """
+    Offline backend for load tests and benchmarks.
+
+    Replies are derived from the prompt (same prompt → same reply).
+    Timing mimics a real model:
+    - latency: seconds before the first token
+    - tokens_per_second: output rate (0 → instant)
+    - prefill_tokens_per_second: prompt processing rate (0 → free)
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        tokens_per_second: float = 200,
+        reply_words: int = 40,
+        prefill_tokens_per_second: float = 0,
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.reply_words = reply_words
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+
+    def _reply_words(self, prompt: str):
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+        last_line = prompt.strip().splitlines()[-1] if prompt.strip() else ""
+        words = [f"[fake:{digest[:8]}]"] + last_line.split()[: self.reply_words // 2]
+
+        # pad deterministically up to reply_words
+        i = 0
+        while len(words) < self.reply_words:
+            words.append(f"w{digest[i % len(digest)]}{i}")
+            i += 1
+        return words
+
+    def _sleep_for(self, text: str):
+        if self.tokens_per_second:
+            time.sleep(estimate_tokens(text) / self.tokens_per_second)
+
+    def _prefill(self, prompt: str):
+        time.sleep(self.latency)
+        if self.prefill_tokens_per_second:
+            time.sleep(estimate_tokens(prompt) / self.prefill_tokens_per_second)
+
+    def generate(self, prompt, *, config=None):
+        text = " ".join(self._reply_words(prompt))
+        self._prefill(prompt)
+        self._sleep_for(text)
+        return text
+
+    def stream(self, prompt, *, config=None):
+        self._prefill(prompt)
+        for i, word in enumerate(self._reply_words(prompt)):
+            chunk = word if i == 0 else " " + word
+            self._sleep_for(chunk)
+            yield chunk
+
+
+# -------------------------------------------------
+# Selection
+# -------------------------------------------------
+
+def create_backend(name: str = None) -> LLMBackend:
+    """
+    LLM_BACKEND=gemini (default) | fake
+
+    Fake tuning: FAKE_LLM_LATENCY (seconds), FAKE_LLM_TOKENS_PER_SEC,
+    FAKE_LLM_PREFILL_TOKENS_PER_SEC
+    """
+    name = (name or os.getenv("LLM_BACKEND") or "gemini").lower()
+
+    if name == "gemini":
+        return GeminiBackend(
+            api_key=os.getenv("GEMINI_API_KEY"),
+            model=os.getenv("GEMINI_MODEL", DEFAULT_MODEL),
+        )
+
+    if name == "fake":
+        return FakeBackend(
+            latency=float(os.getenv("FAKE_LLM_LATENCY", "0.2")),
+            tokens_per_second=float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", "200")),
+            prefill_tokens_per_second=float(os.getenv("FAKE_LLM_PREFILL_TOKENS_PER_SEC", "0")),
+        )
+
+    raise ValueError(f"Unknown LLM backend: {name}")
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _wrap(backend: LLMBackend):
+    """
+    metrics → retries/breaker/concurrency limit → backend
+
+    LLM_MAX_CONCURRENCY: in-flight calls per process (default 4)
+    LLM_MAX_RETRIES: retries on timeouts / 429 / 5xx (default 3)
+    """
+    return InstrumentedBackend(ResilientBackend(
+        backend,
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+    ))
+
+
+def get_backend() -> LLMBackend:
+    """
+    The process-wide backend, wrapped with resilience (llm/resilience.py)
+    and call metrics (llm/metrics.py).
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _wrap(create_backend())
+    return _backend
+
+
+def set_backend(backend: LLMBackend, *, wrap: bool = True):
+    global _backend
+    _backend = _wrap(backend) if wrap else backend
+
+
+def get_circuit_state():
+    """
+    Breaker state of the process-wide backend (None if not wrapped).
+    """
+    layer = get_backend()
+    while layer is not None:
+        breaker = getattr(layer, "breaker", None)
+        if breaker is not None:
+            return {"state": breaker.state, "consecutive_failures": breaker.failures}
+        layer = getattr(layer, "inner", None)
+    return None
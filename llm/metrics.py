@@ -0,0 +1,351 @@
+# llm/metrics.py
+
+import bisect
+import contextvars
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from llm.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = Path("data/llm_metrics.db")
+DB_PATH.parent.mkdir(exist_ok=True)
+
+# Rolling log: keep this many most recent calls
+LOG_RETENTION = 20000
+_PRUNE_EVERY = 500
+
+# Latency histogram bucket upper bounds (ms); last bucket is +inf
+LATENCY_BUCKETS_MS = [100, 250, 500, 1000, 2500, 5000, 10000, 20000, 40000, 80000]
+
+# USD per 1M tokens (gemini-2.5-flash list price); override via env
+PRICE_INPUT_PER_M = float(os.getenv("LLM_PRICE_INPUT_PER_M", "0.30"))
+PRICE_OUTPUT_PER_M = float(os.getenv("LLM_PRICE_OUTPUT_PER_M", "2.50"))
+
+
+# -------------------------------------------------
+# Call tags (agent / route / report type)
+# -------------------------------------------------
+
+_tags = contextvars.ContextVar("llm_call_tags", default={})
+
+
+@contextmanager
+def llm_call_context(**tags):
+    """
+    Tag every LLM call made inside the block, e.g.
+    with llm_call_context(agent="ami", route="chat"): ...
+    """
+    token = _tags.set({**_tags.get(), **tags})
+    try:
+        yield
+    finally:
+        _tags.reset(token)
+
+
+def current_tags() -> dict:
+    return dict(_tags.get())
+
+
+# -------------------------------------------------
+# SQLite log
+# -------------------------------------------------
+
+def get_conn():
+    return sqlite3.connect(DB_PATH, timeout=10)
+
+
+def init_db():
+    conn = get_conn()
+    cur = conn.cursor()
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS llm_calls (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at TEXT,
+        backend TEXT,
+        method TEXT,
+        agent TEXT,
+        route TEXT,
+        report_type TEXT,
+        latency_ms REAL,
+        first_token_ms REAL,
+        prompt_tokens INTEGER,
+        response_tokens INTEGER,
+        cost_usd REAL,
+        retries INTEGER,
+        error TEXT
+    )
+    """)
+
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_llm_calls_created
+    ON llm_calls (created_at)
+    """)
+
+    conn.commit()
+    conn.close()
+
+
+# -------------------------------------------------
+# In-memory aggregates
+# -------------------------------------------------
+
+class _Series:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.latency_sum_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.cost_usd = 0.0
+
+    def add(self, call):
+        self.count += 1
+        self.errors += 1 if call["error"] else 0
+        self.retries += call["retries"]
+        self.latency_sum_ms += call["latency_ms"]
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, call["latency_ms"])] += 1
+        self.prompt_tokens += call["prompt_tokens"] or 0
+        self.response_tokens += call["response_tokens"] or 0
+        self.cost_usd += call["cost_usd"] or 0.0
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else "inf"
+        return None
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "latency_avg_ms": round(self.latency_sum_ms / self.count, 1) if self.count else None,
+            "latency_p50_ms": self.quantile(0.5),
+            "latency_p95_ms": self.quantile(0.95),
+            "latency_buckets_ms": dict(zip([*map(str, LATENCY_BUCKETS_MS), "inf"], self.buckets)),
+            "prompt_tokens": self.prompt_tokens,
+            "response_tokens": self.response_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+        }
+
+
+_lock = threading.Lock()
+_series = {}
+_since_prune = 0
+
+
+def _cost(prompt_tokens, response_tokens):
+    return (
+        (prompt_tokens or 0) * PRICE_INPUT_PER_M
+        + (response_tokens or 0) * PRICE_OUTPUT_PER_M
+    ) / 1_000_000
+
+
+def record_call(
+    *,
+    backend: str,
+    method: str,
+    latency_ms: float,
+    prompt_tokens: int = None,
+    response_tokens: int = None,
+    first_token_ms: float = None,
+    retries: int = 0,
+    error: str = None,
+    tags: dict = None,
+):
+    global _since_prune
+
+    tags = tags if tags is not None else current_tags()
+    call = {
+        "created_at": datetime.utcnow().isoformat(),
+        "backend": backend,
+        "method": method,
+        "agent": tags.get("agent"),
+        "route": tags.get("route"),
+        "report_type": tags.get("report_type"),
+        "latency_ms": latency_ms,
+        "first_token_ms": first_token_ms,
+        "prompt_tokens": prompt_tokens,
+        "response_tokens": response_tokens,
+        "cost_usd": _cost(prompt_tokens, response_tokens),
+        "retries": retries,
+        "error": error,
+    }
+
+    key = (call["agent"], call["route"], call["report_type"])
+    with _lock:
+        _series.setdefault(key, _Series()).add(call)
+        _since_prune += 1
+        prune = _since_prune >= _PRUNE_EVERY
+        if prune:
+            _since_prune = 0
+
+    try:
+        _write(call, prune)
+    except sqlite3.Error:
+        logger.exception("Failed to log LLM call")
+
+
+def _write(call, prune):
+    conn = get_conn()
+    conn.execute("""
+        INSERT INTO llm_calls
+        (created_at, backend, method, agent, route, report_type, latency_ms,
+         first_token_ms, prompt_tokens, response_tokens, cost_usd, retries, error)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        call["created_at"], call["backend"], call["method"], call["agent"],
+        call["route"], call["report_type"], call["latency_ms"], call["first_token_ms"],
+        call["prompt_tokens"], call["response_tokens"], call["cost_usd"],
+        call["retries"], call["error"],
+    ))
+
+    if prune:
+        conn.execute("""
+            DELETE FROM llm_calls
+            WHERE id <= (SELECT MAX(id) FROM llm_calls) - ?
+        """, (LOG_RETENTION,))
+
+    conn.commit()
+    conn.close()
+
+
+def get_metrics() -> dict:
+    """
+    Aggregates since process start, one series per (agent, route, report_type).
+    """
+    total = _Series()
+
+    with _lock:
+        series = [
+            {"agent": k[0], "route": k[1], "report_type": k[2], **s.to_dict()}
+            for k, s in _series.items()
+        ]
+
+        for s in _series.values():
+            total.count += s.count
+            total.errors += s.errors
+            total.retries += s.retries
+            total.latency_sum_ms += s.latency_sum_ms
+            total.buckets = [a + b for a, b in zip(total.buckets, s.buckets)]
+            total.prompt_tokens += s.prompt_tokens
+            total.response_tokens += s.response_tokens
+            total.cost_usd += s.cost_usd
+
+    return {"total": total.to_dict(), "series": series}
+
+
+def get_recent_calls(limit: int = 100):
+    conn = get_conn()
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(
+        "SELECT * FROM llm_calls ORDER BY id DESC LIMIT ?", (limit,)
+    ).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+
+# -------------------------------------------------
+# Backend wrapper
+# -------------------------------------------------
+
+class InstrumentedBackend:
+    """
+    Wraps an LLMBackend and records every generate / stream call.
+    Token counts come from backend usage metadata when available,
+    otherwise from llm.tokens estimates.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.name = inner.name
+
+    def generate(self, prompt, *, config=None):
+        start = time.perf_counter()
+        try:
+            text, usage = self.inner.generate_with_usage(prompt, config=config)
+        except Exception as e:
+            record_call(
+                backend=self.name,
+                method="generate",
+                latency_ms=(time.perf_counter() - start) * 1000,
+                prompt_tokens=estimate_tokens(prompt),
+                retries=getattr(e, "retries", 0),
+                error=type(e).__name__,
+            )
+            raise
+
+        usage = usage or {}
+        record_call(
+            backend=self.name,
+            method="generate",
+            latency_ms=(time.perf_counter() - start) * 1000,
+            prompt_tokens=usage.get("prompt_tokens") or estimate_tokens(prompt),
+            response_tokens=usage.get("response_tokens") or estimate_tokens(text),
+            retries=usage.get("retries", 0),
+        )
+        return text
+
+    def stream(self, prompt, *, config=None):
+        # tags and the inner stream are taken now: the generator body runs
+        # later, outside the caller's llm_call_context / llm_deadline block
+        start = time.perf_counter()
+        inner = self.inner.stream(prompt, config=config)
+        return self._stream(prompt, inner, start, current_tags())
+
+    def _stream(self, prompt, inner, start, tags):
+        first_token_ms = None
+        chunks = []
+        error = None
+
+        try:
+            for chunk in inner:
+                if first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - start) * 1000
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            record_call(
+                backend=self.name,
+                method="stream",
+                latency_ms=(time.perf_counter() - start) * 1000,
+                first_token_ms=first_token_ms,
+                prompt_tokens=estimate_tokens(prompt),
+                response_tokens=estimate_tokens("".join(chunks)),
+                error=error,
+                tags=tags,
+            )
+
+    def batch(self, prompts, *, config=None, max_workers: int = 4):
+        # route through self.generate so each call is recorded; each call
+        # runs in a copy of the caller's context (tags, llm_deadline, ...)
+        prompts = list(prompts)
+        if not prompts:
+            return []
+
+        contexts = [contextvars.copy_context() for _ in prompts]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(prompts))) as pool:
+            return list(pool.map(
+                lambda pc: pc[1].run(self.generate, pc[0], config=config),
+                zip(prompts, contexts),
+            ))
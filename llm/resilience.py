@@ -0,0 +1,270 @@
+# llm/resilience.py
+
+import contextvars
+import itertools
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# google-genai talks to the API through httpx; its transport errors
+# (timeouts, dropped connections) reach us unwrapped
+try:
+    import httpx
+except ImportError:
+    _TRANSIENT_ERRORS = (TimeoutError, ConnectionError)
+else:
+    _TRANSIENT_ERRORS = (TimeoutError, ConnectionError, httpx.TimeoutException, httpx.TransportError)
+
+
+class LLMUnavailableError(Exception):
+    """
+    The LLM could not answer in time: circuit open, too many concurrent
+    calls, deadline exceeded or retries exhausted.
+    """
+
+    def __init__(self, message, *, retries: int = 0):
+        super().__init__(message)
+        self.retries = retries
+
+
+# -------------------------------------------------
+# Deadlines
+# -------------------------------------------------
+
+_deadline = contextvars.ContextVar("llm_deadline", default=None)
+
+
+@contextmanager
+def llm_deadline(seconds: float):
+    """
+    Bound the total time (queueing + retries) of LLM calls in the block.
+    Nested deadlines can only shorten the outer one.
+    """
+    new = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(min(new, outer) if outer else new)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time():
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+# -------------------------------------------------
+# Circuit breaker
+# -------------------------------------------------
+
+class CircuitBreaker:
+    """
+    closed → (failure_threshold consecutive failures) → open
+    open → (reset_timeout elapsed) → half-open: one probe call
+    half-open → success: closed / failure: open again
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probe_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._probe_in_flight:
+                    logger.warning("LLM circuit opened after %d failures", self.failures)
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+# -------------------------------------------------
+# Backend wrapper
+# -------------------------------------------------
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Transient failures worth retrying (and counting against the circuit):
+    timeouts, transport errors, 408 / 429 and 5xx responses.
+    """
+    if isinstance(error, _TRANSIENT_ERRORS):
+        return True
+    status = getattr(error, "code", None) or getattr(error, "status_code", None)
+    return status in RETRYABLE_STATUS or (isinstance(status, int) and status >= 500)
+
+
+def _remaining(deadline):
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class ResilientBackend:
+    """
+    Wraps an LLMBackend with:
+    - a concurrency limit (max_concurrency in-flight calls per process)
+    - exponential backoff with full jitter on retryable errors
+    - deadline propagation (see llm_deadline)
+    - a circuit breaker that fails fast while the backend is down
+    """
+
+    def __init__(
+        self,
+        inner,
+        *,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        queue_timeout: float = 30.0,
+        breaker: CircuitBreaker = None,
+    ):
+        self.inner = inner
+        self.name = inner.name
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.queue_timeout = queue_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _enter(self, attempt, deadline):
+        """
+        Take a call slot, then ask the breaker (slot first, so a granted
+        half-open probe is never stranded by a queue timeout).
+        """
+        remaining = _remaining(deadline)
+        timeout = self.queue_timeout if remaining is None else min(self.queue_timeout, remaining)
+        if timeout <= 0 or not self._slots.acquire(timeout=timeout):
+            raise LLMUnavailableError("LLM busy: no free call slot before deadline", retries=attempt)
+
+        if not self.breaker.allow():
+            self._slots.release()
+            raise LLMUnavailableError("LLM temporarily unavailable (circuit open)", retries=attempt)
+
+    def _failed(self, error, attempt, deadline):
+        if not is_retryable(error):
+            # the backend answered (bad request, safety block, ...): it is
+            # up, so this must not open the circuit for everyone
+            self.breaker.record_success()
+            raise error
+
+        self.breaker.record_failure()
+        if attempt >= self.max_retries:
+            raise LLMUnavailableError(
+                f"LLM failed after {attempt + 1} attempts: {error}", retries=attempt
+            ) from error
+
+        delay = self._backoff(attempt)
+        remaining = _remaining(deadline)
+        if remaining is not None and delay >= remaining:
+            raise LLMUnavailableError("LLM deadline exceeded", retries=attempt) from error
+
+        logger.info("LLM call failed (%s), retry %d in %.2fs", error, attempt + 1, delay)
+        time.sleep(delay)
+
+    def generate(self, prompt, *, config=None):
+        return self.generate_with_usage(prompt, config=config)[0]
+
+    def generate_with_usage(self, prompt, *, config=None):
+        deadline = _deadline.get()
+
+        for attempt in itertools.count():
+            self._enter(attempt, deadline)
+            try:
+                text, usage = self.inner.generate_with_usage(prompt, config=config)
+            except Exception as e:
+                error = e
+            else:
+                self.breaker.record_success()
+                return text, {**(usage or {}), "retries": attempt}
+            finally:
+                self._slots.release()
+
+            self._failed(error, attempt, deadline)
+
+    def stream(self, prompt, *, config=None):
+        # deadline captured now: the generator body runs later
+        return self._stream(prompt, config, _deadline.get())
+
+    def _stream(self, prompt, config, deadline):
+        """
+        Retries only cover opening the stream (before the first chunk);
+        a failure mid-stream is raised to the caller. The call slot is
+        held until the stream is exhausted or closed.
+        """
+        for attempt in itertools.count():
+            self._enter(attempt, deadline)
+            try:
+                it = iter(self.inner.stream(prompt, config=config))
+                first = next(it, None)
+            except Exception as e:
+                self._slots.release()
+                self._failed(e, attempt, deadline)
+                continue
+
+            try:
+                if first is not None:
+                    yield first
+                yield from it
+            except Exception as e:
+                if is_retryable(e):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                raise
+            else:
+                self.breaker.record_success()
+            finally:
+                self._slots.release()
+            return
+
+    def batch(self, prompts, *, config=None, max_workers: int = 4):
+        prompts = list(prompts)
+        if not prompts:
+            return []
+
+        # each worker runs in a copy of the caller's context (deadline, tags)
+        contexts = [contextvars.copy_context() for _ in prompts]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(prompts))) as pool:
+            return list(pool.map(
+                lambda pc: pc[1].run(self.generate, pc[0], config=config),
+                zip(prompts, contexts),
+            ))
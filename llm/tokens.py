@@ -0,0 +1,124 @@
+# llm/tokens.py
+
+import math
+import re
+import threading
+
+
+# -------------------------------------------------
+# Token estimation
+# -------------------------------------------------
+
+# CJK ideographs, kana and hangul are roughly one token per character
+# for Gemini-style tokenizers; everything else averages ~4 chars/token.
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+CHARS_PER_TOKEN = 4
+
+_tokenizer = None
+
+
+def set_tokenizer(fn):
+    """
+    Plug in an exact tokenizer: fn(text) -> int.
+    Pass None to go back to the heuristic.
+    """
+    global _tokenizer
+    _tokenizer = fn
+
+
+def estimate_tokens(text) -> int:
+    """
+    Fast token count for a prompt fragment.
+
+    Uses the pluggable tokenizer when one is set,
+    otherwise a character-class heuristic (never 0 for non-empty text).
+    """
+    if not text:
+        return 0
+
+    if _tokenizer is not None:
+        return int(_tokenizer(text))
+
+    cjk = len(_CJK_RE.findall(text))
+    other = len(text) - cjk
+    return cjk + math.ceil(other / CHARS_PER_TOKEN)
+
+
+# -------------------------------------------------
+# Truncation metrics
+# -------------------------------------------------
+
+_metrics_lock = threading.Lock()
+_metrics = {
+    "packs": 0,
+    "truncated_packs": 0,
+    "items_kept": 0,
+    "items_dropped": 0,
+    "tokens_kept": 0,
+    "tokens_dropped": 0,
+}
+
+
+def _record(stats: dict):
+    with _metrics_lock:
+        _metrics["packs"] += 1
+        _metrics["truncated_packs"] += 1 if stats["truncated"] else 0
+        _metrics["items_kept"] += stats["kept"]
+        _metrics["items_dropped"] += stats["dropped"]
+        _metrics["tokens_kept"] += stats["tokens"]
+        _metrics["tokens_dropped"] += stats["tokens_dropped"]
+
+
+def get_truncation_metrics() -> dict:
+    with _metrics_lock:
+        return dict(_metrics)
+
+
+# -------------------------------------------------
+# Packing
+# -------------------------------------------------
+
+def pack_texts(texts, budget, *, separator="\n"):
+    """
+    Fit as many texts as possible into `budget` tokens.
+
+    - texts must already be in priority order (most recent / relevant first)
+    - items that do not fit are skipped, smaller later items may still fit
+    - kept items are returned in their original order
+
+    Returns (kept_texts, stats).
+    """
+    texts = [t for t in texts if t]
+    sep_cost = estimate_tokens(separator) if separator.strip() else 0
+
+    kept = []
+    used = 0
+    dropped_tokens = 0
+
+    for t in texts:
+        cost = estimate_tokens(t) + (sep_cost if kept else 0)
+        if budget is None or used + cost <= budget:
+            kept.append(t)
+            used += cost
+        else:
+            dropped_tokens += estimate_tokens(t)
+
+    stats = {
+        "budget": budget,
+        "tokens": used,
+        "kept": len(kept),
+        "dropped": len(texts) - len(kept),
+        "tokens_dropped": dropped_tokens,
+        "truncated": len(kept) < len(texts),
+    }
+    _record(stats)
+
+    return kept, stats
+
+
+def remaining_budget(total_budget, *fixed_parts) -> int:
+    """
+    Tokens left for variable content after the fixed prompt parts.
+    """
+    used = sum(estimate_tokens(p) for p in fixed_parts if p)
+    return max(0, total_budget - used)
@@ -0,0 +1,72 @@
+"""
+Token reduction + end-to-end latency of extractive pre-summarization.
+
+Runs summarize_with_llm() on synthetic note corpora against the fake
+LLM backend (with a prompt prefill cost), with and without compression.
+
+    python -m scripts.bench_extractive --notes 50 200 800 --ratio 0.4
+"""
+import argparse
+import random
+import time
+
+from intelligence.category_summary import summarize_with_llm
+from intelligence.extractive import extract_key_sentences
+from llm.backend import FakeBackend
+from llm.tokens import estimate_tokens
+
+
+TOPICS = ["sleep", "fever", "reading", "school", "appetite", "mood", "cough", "drawing"]
+FILLER = ["today", "again", "a bit", "in the evening", "after lunch", "as usual", "for a while"]
+
+
+def synthetic_notes(n, seed=11):
+    rng = random.Random(seed)
+    notes = []
+    for i in range(n):
+        sentences = []
+        for _ in range(rng.randint(1, 4)):
+            topic = rng.choice(TOPICS)
+            detail = " ".join(rng.choice(FILLER) for _ in range(rng.randint(2, 6)))
+            sentences.append(f"Noted {topic} {detail} on day {rng.randint(1, 90)}.")
+        # users often repeat themselves
+        if notes and rng.random() < 0.2:
+            sentences.append(rng.choice(notes).split(". ")[0].rstrip(".") + ".")
+        notes.append(" ".join(sentences))
+    return notes
+
+
+def run(sizes, ratio):
+    backend = FakeBackend(latency=0.05, tokens_per_second=0, prefill_tokens_per_second=20000)
+
+    print(f"{'notes':>6} {'tokens':>8} {'kept':>8} {'saved':>6} {'extract':>9} {'e2e raw':>9} {'e2e cmp':>9}")
+    for n in sizes:
+        notes = synthetic_notes(n)
+        before = sum(estimate_tokens(t) for t in notes)
+
+        t = time.perf_counter()
+        compressed = extract_key_sentences(notes, ratio=ratio)
+        extract_s = time.perf_counter() - t
+        after = sum(estimate_tokens(t) for t in compressed)
+
+        t = time.perf_counter()
+        summarize_with_llm("bench", notes, backend.generate)
+        raw_s = time.perf_counter() - t
+
+        t = time.perf_counter()
+        summarize_with_llm("bench", notes, backend.generate, compression_ratio=ratio)
+        cmp_s = time.perf_counter() - t
+
+        print(
+            f"{n:>6} {before:>8} {after:>8} {1 - after / before:>6.0%} "
+            f"{extract_s * 1e3:>7.1f}ms {raw_s * 1e3:>7.1f}ms {cmp_s * 1e3:>7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, nargs="+", default=[50, 200, 800])
+    parser.add_argument("--ratio", type=float, default=0.4)
+    args = parser.parse_args()
+
+    run(args.notes, args.ratio)
@@ -0,0 +1,66 @@
+"""
+Latency benchmark for intelligence.retrieval.BM25Index.
+
+Builds an index over synthetic entries (default 100k) and times
+incremental adds and top-k searches.
+
+    python -m scripts.bench_retrieval --entries 100000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from intelligence.retrieval import BM25Index
+
+
+VOCAB_SIZE = 20000
+CJK_SAMPLE = "今天睡得少发烧咳嗽学习项目进度会议决定上线问题修复"
+
+
+def synthetic_entry(rng):
+    words = [f"w{int(rng.paretovariate(1.1)) % VOCAB_SIZE}" for _ in range(rng.randint(8, 60))]
+    if rng.random() < 0.3:
+        start = rng.randrange(len(CJK_SAMPLE) - 6)
+        words.append(CJK_SAMPLE[start:start + 6])
+    return " ".join(words)
+
+
+def run(n_entries, n_queries, k, seed=7):
+    rng = random.Random(seed)
+    index = BM25Index()
+
+    t0 = time.perf_counter()
+    for i in range(n_entries):
+        index.add(i, synthetic_entry(rng))
+    build_s = time.perf_counter() - t0
+
+    add_times = []
+    for i in range(n_entries, n_entries + 1000):
+        t = time.perf_counter()
+        index.add(i, synthetic_entry(rng))
+        add_times.append(time.perf_counter() - t)
+
+    search_times = []
+    for _ in range(n_queries):
+        query = synthetic_entry(rng)[:80]
+        t = time.perf_counter()
+        index.search(query, k)
+        search_times.append(time.perf_counter() - t)
+
+    search_times.sort()
+    print(f"entries:          {n_entries}")
+    print(f"build:            {build_s:.2f}s ({build_s / n_entries * 1e6:.1f}µs/entry)")
+    print(f"incremental add:  {statistics.mean(add_times) * 1e6:.1f}µs mean")
+    print(f"search p50:       {search_times[len(search_times) // 2] * 1e3:.2f}ms")
+    print(f"search p95:       {search_times[int(len(search_times) * 0.95)] * 1e3:.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=8)
+    args = parser.parse_args()
+
+    run(args.entries, args.queries, args.k)
@@ -0,0 +1,92 @@
+"""
+Request-count benchmark for sync.sync_service.sync_rows_to_sheets,
+run against the in-memory fake Sheets service (no network).
+
+Syncs N synthetic entries into an empty tab, re-saves all of them
+(updated_at moves) while editing the content of a share, and syncs
+again: only the edited rows are rewritten. Then checks the sheet
+matches the local rows.
+
+    python -m scripts.bench_sheets_sync --rows 5000
+"""
+import argparse
+import random
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from sync import sync_state
+from sync.fake_sheets import FakeSheetsService
+from sync.google_sheets_adapter import EXPECTED_COLUMNS, GoogleSheetsAdapter
+from sync.sync_service import sheet_row_hash, sync_rows_to_sheets
+
+TAB = "observations"
+
+
+def synthetic_rows(n, rng):
+    return [
+        {
+            "uuid": str(uuid.UUID(int=rng.getrandbits(128))),
+            "agent": "ami",
+            "type": "observation",
+            "subject": "language",
+            "tags": [],
+            "content": [f"note {i} " + " ".join(f"w{rng.randrange(1000)}" for _ in range(12))],
+            "created_at": f"2026-01-01T00:00:{i % 60:02d}",
+            "updated_at": f"2026-01-01T00:00:{i % 60:02d}",
+        }
+        for i in range(n)
+    ]
+
+
+def check_sheet(service, rows):
+    adapter = GoogleSheetsAdapter("bench", TAB, service=service)
+    sheet = service.tabs[TAB]
+    assert sheet[0] == EXPECTED_COLUMNS, sheet[0]
+    by_uuid = {r[0]: r for r in sheet[1:]}
+    assert len(by_uuid) == len(rows) == len(sheet) - 1
+    for row in rows:
+        # skipped rows keep their previous updated_at
+        assert sheet_row_hash(by_uuid[row["uuid"]]) == sheet_row_hash(adapter.format_row(row)), row["uuid"]
+
+
+def run(n_rows, edit_share, seed=7):
+    # keep bench row hashes out of the real data/sync_state.db
+    sync_state.DB_PATH = Path(tempfile.mkdtemp()) / "sync_state.db"
+    sync_state.init_db()
+
+    rng = random.Random(seed)
+    rows = synthetic_rows(n_rows, rng)
+    service = FakeSheetsService()
+
+    for label in ("initial", "resync"):
+        before = service.request_count
+        start = time.perf_counter()
+        result = sync_rows_to_sheets("bench", TAB, rows, service=service)
+        elapsed = time.perf_counter() - start
+
+        check_sheet(service, rows)
+        print(
+            f"{label:8s} rows={len(rows)} inserted={result['inserted']} updated={result['updated']} "
+            f"skipped={result['skipped']} "
+            f"requests={service.request_count - before} "
+            f"(per-row sync: {len(rows) + 2}) {elapsed * 1000:.0f}ms"
+        )
+
+        for row in rows:
+            row["updated_at"] = "2026-01-02T00:00:00"
+        for row in rng.sample(rows, int(len(rows) * edit_share)):
+            row["content"] = row["content"] + ["edited"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--edit-share", type=float, default=0.1)
+    args = parser.parse_args()
+    run(args.rows, args.edit_share)
+
+
+if __name__ == "__main__":
+    main()
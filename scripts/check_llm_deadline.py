@@ -0,0 +1,103 @@
+"""
+Check that streamed LLM calls honour llm_deadline.
+
+A stream is a lazy generator: its body runs when the caller iterates,
+possibly after the llm_deadline block has exited. The deadline must
+still bound the retries behind it.
+
+    python -m scripts.check_llm_deadline
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from llm import metrics
+from llm.backend import LLMBackend, get_backend, set_backend
+from llm.metrics import InstrumentedBackend, llm_call_context
+from llm.resilience import (
+    CircuitBreaker,
+    LLMUnavailableError,
+    ResilientBackend,
+    llm_deadline,
+    remaining_time,
+)
+
+
+class ProbeBackend(LLMBackend):
+    """
+    Streams two chunks, recording remaining_time() as it goes; with
+    fail=True every attempt to open the stream times out.
+    """
+
+    name = "probe"
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.attempts = 0
+        self.seen = []
+
+    def generate(self, prompt, *, config=None):
+        return "".join(self.stream(prompt, config=config))
+
+    def stream(self, prompt, *, config=None):
+        self.attempts += 1
+        if self.fail:
+            raise TimeoutError("probe timeout")
+        for chunk in ("a", "b"):
+            self.seen.append(remaining_time())
+            yield chunk
+
+
+def check_consumed_inside():
+    # the chat_stream pattern: iterate inside the deadline block
+    probe = ProbeBackend()
+    set_backend(probe)
+    with llm_call_context(route="check"), llm_deadline(5):
+        text = "".join(get_backend().stream("hi"))
+
+    ok = text == "ab" and all(r is not None and 0 < r <= 5 for r in probe.seen)
+    return ok, f"chunks saw remaining_time={probe.seen}"
+
+
+def check_consumed_outside():
+    # stream opened under a short deadline, iterated after the block:
+    # retries must stop at the deadline, not run to max_retries
+    probe = ProbeBackend(fail=True)
+    set_backend(InstrumentedBackend(ResilientBackend(
+        probe,
+        max_retries=50,
+        base_delay=0.2,
+        max_delay=0.2,
+        breaker=CircuitBreaker(failure_threshold=100),
+    )), wrap=False)
+    with llm_deadline(0.5):
+        stream = get_backend().stream("hi")
+
+    start = time.monotonic()
+    try:
+        list(stream)
+    except LLMUnavailableError as e:
+        error = str(e)
+    else:
+        error = None
+    elapsed = time.monotonic() - start
+
+    ok = error is not None and "deadline" in error and elapsed < 2
+    return ok, f"error={error!r} attempts={probe.attempts} elapsed={elapsed:.2f}s"
+
+
+def main():
+    metrics.DB_PATH = Path(tempfile.mkdtemp()) / "llm_metrics.db"
+    metrics.init_db()
+
+    failed = 0
+    for check in (check_consumed_inside, check_consumed_outside):
+        ok, detail = check()
+        print(f"{'ok  ' if ok else 'FAIL'} {check.__name__}: {detail}")
+        failed += not ok
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+Concurrency stress test for session context mutation.
+
+Many threads update the drafts of a few sessions at once, the way chat
+and draft autosave requests do under a threaded server. Each update is
+a read-modify-write of ctx.collected_text. With per-session locking no
+update may be lost; --no-lock shows what happens without it.
+
+--processes N runs the sqlite case from N worker processes sharing one
+database (gunicorn -w N): the per-process locks no longer cover every
+writer, and the compare-and-swap save must either merge an update or
+reject it with SessionConflictError (counted as "conflicts"), never
+drop it silently.
+
+    python -m scripts.stress_sessions --backend memory
+    python -m scripts.stress_sessions --backend sqlite --threads 16
+    python -m scripts.stress_sessions --backend sqlite --processes 4 --threads 8
+"""
+import argparse
+import multiprocessing
+import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from session.store import SessionConflictError, SessionStore, SQLiteSessionStore, locked_session
+
+
+@contextmanager
+def unlocked_session(store, key):
+    ctx = store.load(key)
+    try:
+        yield ctx
+    finally:
+        if store.persistent:
+            store.save_many({key: ctx})
+
+
+def _hammer(store, keys, n_threads, ops_per_thread, lock, seed, tag=""):
+    """
+    Run the update threads; returns (applied updates per key, errors, conflicts).
+    """
+    applied = {k: 0 for k in keys}
+    applied_lock = threading.Lock()
+    errors = []
+    conflicts = []
+
+    def worker(t):
+        rng = random.Random(seed + t)
+        for i in range(ops_per_thread):
+            key = rng.choice(keys)
+            try:
+                with (locked_session(store, key) if lock else unlocked_session(store, key)) as ctx:
+                    # chat: append a line / autosave: rewrite the whole draft
+                    text = list(ctx.collected_text)
+                    time.sleep(rng.random() * 0.001)
+                    ctx.collected_text = text + [f"{tag}t{t}-{i}"]
+            except SessionConflictError as e:
+                conflicts.append(e)
+                continue
+            except Exception as e:
+                errors.append(e)
+                continue
+            with applied_lock:
+                applied[key] += 1
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(n_threads)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+
+    return applied, errors, conflicts
+
+
+def _process_worker(path, keys, n_threads, ops_per_thread, lock, seed, queue):
+    store = SQLiteSessionStore(path)
+    applied, errors, conflicts = _hammer(store, keys, n_threads, ops_per_thread, lock, seed, tag=f"p{seed}")
+    queue.put((applied, [repr(e) for e in errors], len(conflicts)))
+
+
+def run(backend, n_sessions, n_threads, ops_per_thread, lock=True, seed=7, processes=1):
+    path = Path(tempfile.mkdtemp()) / "sessions.db"
+    if backend == "memory":
+        store = SessionStore()
+    else:
+        store = SQLiteSessionStore(path)
+
+    keys = [f"sid{i}:ami" for i in range(n_sessions)]
+    start = time.perf_counter()
+
+    if processes > 1:
+        queue = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(
+                target=_process_worker,
+                args=(path, keys, n_threads, ops_per_thread, lock, seed + 1000 * p, queue),
+            )
+            for p in range(processes)
+        ]
+        for proc in procs:
+            proc.start()
+        outcomes = [queue.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+
+        expected = {k: sum(o[0][k] for o in outcomes) for k in keys}
+        errors = [e for o in outcomes for e in o[1]]
+        conflicts = sum(o[2] for o in outcomes)
+    else:
+        expected, errors, conflict_list = _hammer(store, keys, n_threads, ops_per_thread, lock, seed)
+        conflicts = len(conflict_list)
+
+    elapsed = time.perf_counter() - start
+
+    lost = 0
+    for key in keys:
+        with locked_session(store, key) as ctx:
+            lost += expected[key] - len(ctx.collected_text)
+
+    total = processes * n_threads * ops_per_thread
+    print(
+        f"backend={backend} lock={lock} processes={processes} sessions={n_sessions} "
+        f"threads={n_threads} ops={total}"
+    )
+    print(f"  elapsed: {elapsed:.2f}s ({total / elapsed:.0f} ops/s)")
+    print(f"  errors:  {len(errors)}")
+    print(f"  conflicts (rejected, 409): {conflicts}")
+    print(f"  lost updates: {lost}")
+    return lost, errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--ops", type=int, default=200, help="updates per thread")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes (sqlite only)")
+    parser.add_argument("--no-lock", action="store_true")
+    args = parser.parse_args()
+
+    if args.processes > 1 and args.backend != "sqlite":
+        parser.error("--processes needs --backend sqlite")
+
+    lost, errors = run(
+        args.backend, args.sessions, args.threads, args.ops,
+        lock=not args.no_lock, processes=args.processes,
+    )
+    if not args.no_lock and (lost or errors):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,31 @@
+from dataclasses import asdict
+
+from agents.common.subjects import SimpleProject
+from subjects.domain_subject import DomainSubject
+from subjects.person_subject import PersonSubject
+
+
 class SessionContext:
     """
     Conversation-scoped state.
     Must persist across turns.
+
+    __slots__: one instance per (session, agent) lives in the session
+    store, so no per-instance __dict__.
     """
 
+    __slots__ = (
+        "active_domain",
+        "active_person",
+        "active_project",
+        "pending_subject",
+        "collected_text",
+        "is_question_turn",
+        "last_user_content",
+        "pending_save_confirmation",
+        "pending_record_text",
+    )
+
     def __init__(self):
         # Resolved subjects
         self.active_domain = None
@@ -24,3 +46,41 @@ class SessionContext:
         self.pending_save_confirmation = False
 
         self.pending_record_text = None
+
+    # -------------------------------------------------
+    # Serialization (shared session stores)
+    # -------------------------------------------------
+
+    def to_dict(self) -> dict:
+        """
+        Compact JSON-safe state; default values are left out.
+        """
+        data = {
+            "domain": asdict(self.active_domain) if self.active_domain else None,
+            "person": asdict(self.active_person) if self.active_person else None,
+            "project": self.active_project.descriptors if self.active_project else None,
+            "pending": self.pending_subject,
+            "text": self.collected_text,
+            "question": self.is_question_turn,
+            "last": self.last_user_content,
+            "confirm": self.pending_save_confirmation,
+            "record": self.pending_record_text,
+        }
+        return {k: v for k, v in data.items() if v}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SessionContext":
+        ctx = cls()
+        if data.get("domain"):
+            ctx.active_domain = DomainSubject(**data["domain"])
+        if data.get("person"):
+            ctx.active_person = PersonSubject(**data["person"])
+        if data.get("project"):
+            ctx.active_project = SimpleProject(descriptors=data["project"])
+        ctx.pending_subject = data.get("pending")
+        ctx.collected_text = list(data.get("text", []))
+        ctx.is_question_turn = data.get("question", False)
+        ctx.last_user_content = data.get("last")
+        ctx.pending_save_confirmation = data.get("confirm", False)
+        ctx.pending_record_text = data.get("record")
+        return ctx
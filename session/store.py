@@ -0,0 +1,501 @@
+# session/store.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from session.context import SessionContext
+
+
+class SessionStore:
+    """
+    Bounded in-memory map of session key → SessionContext
+    (single-process deployments).
+
+    Store interface used by app.py:
+    - load(key) -> SessionContext (a fresh one if missing / expired)
+    - save_many({key: ctx}) after the request; no-op here since
+      load() hands out the live object
+    - persistent: True when contexts must be written back
+
+    - capacity: at most this many contexts; the least recently used is
+      evicted when a new one is added
+    - ttl_seconds: contexts idle for longer are dropped (checked on
+      access and swept from the LRU end on every insert)
+    - thread-safe; get_or_create is atomic per key
+    """
+
+    persistent = False
+
+    def __init__(self, capacity: int = 10000, ttl_seconds: float = 3600, clock=time.monotonic):
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._items = OrderedDict()  # key -> [value, last_access]; oldest access first
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evicted_lru = 0
+        self.evicted_ttl = 0
+
+    def _expired(self, last_access, now):
+        return self.ttl_seconds and now - last_access > self.ttl_seconds
+
+    def _sweep(self, now):
+        # entries are ordered by last access, so expired ones sit at the front
+        while self._items:
+            key, (_, last_access) = next(iter(self._items.items()))
+            if not self._expired(last_access, now):
+                break
+            del self._items[key]
+            self.evicted_ttl += 1
+
+    def get(self, key):
+        now = self._clock()
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if self._expired(item[1], now):
+                del self._items[key]
+                self.evicted_ttl += 1
+                return None
+            item[1] = now
+            self._items.move_to_end(key)
+            return item[0]
+
+    def get_or_create(self, key, factory):
+        now = self._clock()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and not self._expired(item[1], now):
+                self.hits += 1
+                item[1] = now
+                self._items.move_to_end(key)
+                return item[0]
+
+            if item is not None:
+                del self._items[key]
+                self.evicted_ttl += 1
+
+            self.misses += 1
+            self._sweep(now)
+            while len(self._items) >= self.capacity:
+                self._items.popitem(last=False)
+                self.evicted_lru += 1
+
+            value = factory()
+            self._items[key] = [value, now]
+            return value
+
+    def load(self, key):
+        return self.get_or_create(key, SessionContext)
+
+    def save_many(self, contexts: dict):
+        pass
+
+    def delete(self, key):
+        with self._lock:
+            return self._items.pop(key, None) is not None
+
+    def sweep(self):
+        """
+        Drop every idle-expired context now. Returns the number dropped.
+        """
+        with self._lock:
+            before = self.evicted_ttl
+            self._sweep(self._clock())
+            return self.evicted_ttl - before
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "size": len(self._items),
+                "capacity": self.capacity,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evicted_lru": self.evicted_lru,
+                "evicted_ttl": self.evicted_ttl,
+            }
+
+
+# -------------------------------------------------
+# Per-session locking
+# -------------------------------------------------
+
+class SessionBusyError(Exception):
+    """
+    Another request of the same session held its context for too long.
+    """
+
+
+class SessionConflictError(SessionBusyError):
+    """
+    Another worker process changed the same session fields meanwhile
+    (shared stores only; the per-process locks don't span workers).
+    """
+
+
+class KeyedLocks:
+    """
+    One lock per key, created on demand and dropped once no thread holds
+    or waits for it (the map stays as small as the set of busy sessions).
+    """
+
+    def __init__(self):
+        self._locks = {}  # key -> [lock, holders + waiters]
+        self._guard = threading.Lock()
+
+    def acquire(self, key, timeout: float = None) -> bool:
+        with self._guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+
+        ok = entry[0].acquire(timeout=-1 if timeout is None else timeout)
+        if not ok:
+            self._unref(key, entry)
+        return ok
+
+    def release(self, key):
+        with self._guard:
+            entry = self._locks[key]
+        entry[0].release()
+        self._unref(key, entry)
+
+    def _unref(self, key, entry):
+        with self._guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+    def __len__(self):
+        return len(self._locks)
+
+
+SESSION_LOCKS = KeyedLocks()
+
+# Max seconds a request waits for another request of the same session
+LOCK_TIMEOUT = 10.0
+
+# Merge-and-retry rounds when a shared store reports a concurrent write
+CAS_RETRIES = 3
+
+
+def checkout(store, key, timeout: float = LOCK_TIMEOUT):
+    """
+    Lock the session key, then load its context.
+    Returns (ctx, snapshot); pass both to checkin() when done.
+    """
+    if not SESSION_LOCKS.acquire(key, timeout):
+        raise SessionBusyError(f"Session {key} is busy")
+
+    try:
+        if not store.persistent:
+            return store.load(key), None
+        ctx, version = store.load_versioned(key)
+    except Exception:
+        SESSION_LOCKS.release(key)
+        raise
+
+    # deep copy: the request mutates ctx.collected_text in place
+    return ctx, (_state_copy(ctx.to_dict()), version)
+
+
+def checkin(store, key, ctx, snapshot):
+    """
+    Save the context if it changed (persistent stores), then unlock.
+
+    Shared stores save with compare-and-swap on the row version. If
+    another worker wrote the session since checkout, this request's
+    changed fields are merged onto the newer state and saved again;
+    SessionConflictError if both changed the same field.
+    """
+    try:
+        if store.persistent:
+            base, version = snapshot
+            state = _state_copy(ctx.to_dict())
+            if state != base:
+                _save_merged(store, key, base, state, version)
+    finally:
+        SESSION_LOCKS.release(key)
+
+
+def _state_copy(state: dict) -> dict:
+    return json.loads(json.dumps(state))
+
+
+def merge_states(base: dict, mine: dict, theirs: dict) -> dict:
+    """
+    Three-way merge of to_dict() states, field by field: fields this
+    request changed win unless the other writer changed them too.
+    """
+    merged = dict(theirs)
+    for field in base.keys() | mine.keys():
+        if mine.get(field) == base.get(field):
+            continue
+        if theirs.get(field) not in (base.get(field), mine.get(field)):
+            raise SessionConflictError(f"Session field {field!r} was changed concurrently")
+        merged[field] = mine[field] if field in mine else None
+
+    return {k: v for k, v in merged.items() if v}
+
+
+def _save_merged(store, key, base, state, version):
+    for _ in range(CAS_RETRIES + 1):
+        if store.save_state(key, state, version):
+            return
+        theirs, version = store.load_state(key)
+        state = merge_states(base, state, theirs)
+        base = theirs
+
+    raise SessionConflictError(f"Session {key} kept changing; gave up after {CAS_RETRIES} retries")
+
+
+@contextmanager
+def locked_session(store, key, timeout: float = LOCK_TIMEOUT):
+    """
+    with locked_session(store, key) as ctx: ...  — exclusive access to one
+    session's context for the duration of the block.
+    """
+    ctx, snapshot = checkout(store, key, timeout)
+    try:
+        yield ctx
+    finally:
+        checkin(store, key, ctx, snapshot)
+
+
+# -------------------------------------------------
+# Shared SQLite store (multi-worker deployments)
+# -------------------------------------------------
+
+class SQLiteSessionStore:
+    """
+    SessionContext state in one SQLite table, shared by every worker
+    process on the host (no sticky sessions needed).
+
+    - state is SessionContext.to_dict() as compact JSON
+    - writes are coalesced by the caller: only contexts whose state
+      changed during a request are saved
+    - every row has a version; save_state is a compare-and-swap on it,
+      since per-process locks don't stop two workers racing on a session
+    - idle TTL via updated_at; reads refresh it at most every ttl/4
+    """
+
+    persistent = True
+
+    # Expired rows are deleted every this many saves
+    _SWEEP_EVERY = 200
+
+    def __init__(self, path, ttl_seconds: float = 3600, clock=time.time):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._since_sweep = 0
+
+        self.loads = 0
+        self.misses = 0
+        self.writes = 0
+        self.conflicts = 0
+        self.evicted_ttl = 0
+
+        self.init_db()
+
+    def get_conn(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def init_db(self):
+        conn = self.get_conn()
+        # WAL: readers in one worker don't block a writer in another
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS session_contexts (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            updated_at REAL
+        )
+        """)
+        conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_session_contexts_updated
+        ON session_contexts (updated_at)
+        """)
+        columns = [r[1] for r in conn.execute("PRAGMA table_info(session_contexts)")]
+        if "version" not in columns:
+            conn.execute("ALTER TABLE session_contexts ADD COLUMN version INTEGER DEFAULT 0")
+        conn.commit()
+        conn.close()
+
+    def _expired(self, updated_at, now):
+        return self.ttl_seconds and now - updated_at > self.ttl_seconds
+
+    def load_state(self, key):
+        """
+        (to_dict() state, version); ({}, version) when missing / expired.
+        """
+        now = self._clock()
+        conn = self.get_conn()
+        try:
+            row = conn.execute(
+                "SELECT state, updated_at, version FROM session_contexts WHERE key = ?", (key,)
+            ).fetchone()
+
+            with self._lock:
+                self.loads += 1
+                if row is None or self._expired(row[1], now):
+                    self.misses += 1
+                    return {}, row[2] if row else 0
+
+            if self.ttl_seconds and now - row[1] > self.ttl_seconds / 4:
+                conn.execute(
+                    "UPDATE session_contexts SET updated_at = ? WHERE key = ?", (now, key)
+                )
+                conn.commit()
+
+            return json.loads(row[0]), row[2]
+        finally:
+            conn.close()
+
+    def load_versioned(self, key):
+        state, version = self.load_state(key)
+        return SessionContext.from_dict(state), version
+
+    def load(self, key):
+        return self.load_versioned(key)[0]
+
+    def _count_write(self, rows: int = 1):
+        with self._lock:
+            self.writes += rows
+            self._since_sweep += 1
+            sweep = self._since_sweep >= self._SWEEP_EVERY
+            if sweep:
+                self._since_sweep = 0
+        return sweep
+
+    def _maybe_sweep(self, conn, sweep, now):
+        if sweep and self.ttl_seconds:
+            cur = conn.execute(
+                "DELETE FROM session_contexts WHERE updated_at < ?", (now - self.ttl_seconds,)
+            )
+            with self._lock:
+                self.evicted_ttl += cur.rowcount
+
+    def save_state(self, key, state: dict, version: int) -> bool:
+        """
+        Compare-and-swap: write state only if the row is still at
+        `version` (0 = not stored yet). Returns False on a conflict.
+        """
+        now = self._clock()
+        data = json.dumps(state, ensure_ascii=False, separators=(",", ":"))
+        sweep = self._count_write()
+
+        conn = self.get_conn()
+        try:
+            cur = conn.execute("""
+                UPDATE session_contexts SET state = ?, updated_at = ?, version = version + 1
+                WHERE key = ? AND version = ?
+            """, (data, now, key, version))
+            if cur.rowcount == 0 and version == 0:
+                cur = conn.execute("""
+                    INSERT INTO session_contexts (key, state, updated_at, version) VALUES (?, ?, ?, 1)
+                    ON CONFLICT(key) DO NOTHING
+                """, (key, data, now))
+            saved = cur.rowcount > 0
+            self._maybe_sweep(conn, sweep, now)
+            conn.commit()
+        finally:
+            conn.close()
+
+        if not saved:
+            with self._lock:
+                self.conflicts += 1
+        return saved
+
+    def save_many(self, contexts: dict):
+        """
+        Unconditional write (last write wins); request code goes through
+        checkin(), which uses save_state.
+        """
+        if not contexts:
+            return
+
+        now = self._clock()
+        rows = [
+            (key, json.dumps(ctx.to_dict(), ensure_ascii=False, separators=(",", ":")), now)
+            for key, ctx in contexts.items()
+        ]
+        sweep = self._count_write(len(rows))
+
+        conn = self.get_conn()
+        try:
+            conn.executemany("""
+                INSERT INTO session_contexts (key, state, updated_at, version) VALUES (?, ?, ?, 1)
+                ON CONFLICT(key) DO UPDATE SET
+                    state = excluded.state,
+                    updated_at = excluded.updated_at,
+                    version = session_contexts.version + 1
+            """, rows)
+            self._maybe_sweep(conn, sweep, now)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def delete(self, key):
+        conn = self.get_conn()
+        cur = conn.execute("DELETE FROM session_contexts WHERE key = ?", (key,))
+        conn.commit()
+        conn.close()
+        return cur.rowcount > 0
+
+    def stats(self) -> dict:
+        conn = self.get_conn()
+        size = conn.execute("SELECT COUNT(*) FROM session_contexts").fetchone()[0]
+        conn.close()
+
+        with self._lock:
+            return {
+                "backend": "sqlite",
+                "size": size,
+                "ttl_seconds": self.ttl_seconds,
+                "loads": self.loads,
+                "misses": self.misses,
+                "writes": self.writes,
+                "conflicts": self.conflicts,
+                "evicted_ttl": self.evicted_ttl,
+            }
+
+
+def create_session_store(name: str = None):
+    """
+    SESSION_BACKEND=memory (default, single process) | sqlite (shared by
+    all workers on the host, SESSION_DB_PATH)
+
+    SESSION_IDLE_TTL_SECONDS applies to both; SESSION_STORE_CAPACITY to memory.
+    """
+    name = (name or os.getenv("SESSION_BACKEND") or "memory").lower()
+    ttl_seconds = float(os.getenv("SESSION_IDLE_TTL_SECONDS", "3600"))
+
+    if name == "memory":
+        return SessionStore(
+            capacity=int(os.getenv("SESSION_STORE_CAPACITY", "10000")),
+            ttl_seconds=ttl_seconds,
+        )
+
+    if name == "sqlite":
+        return SQLiteSessionStore(
+            os.getenv("SESSION_DB_PATH", "data/sessions.db"),
+            ttl_seconds=ttl_seconds,
+        )
+
+    raise ValueError(f"Unknown session backend: {name}")
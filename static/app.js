@@ -135,6 +135,42 @@ function appendAmiMessage(text, isPlaceholder = false) {
   return div;
 }
 
+// Minimal SSE reader for POST responses (EventSource only supports GET).
+// A non-2xx response is not a stream: its JSON error is thrown instead.
+async function readEventStream(res, onEvent) {
+  if (!res.ok) {
+    const data = await res.json().catch(() => ({}));
+    throw new Error(data.error || data.message || `Request failed (${res.status})`);
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+
+    let sep;
+    while ((sep = buffer.indexOf("\n\n")) !== -1) {
+      const raw = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+
+      let event = "message";
+      let data = "";
+      raw.split("\n").forEach(line => {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      });
+
+      onEvent(event, data ? JSON.parse(data) : {});
+      if (event === "done") return;
+    }
+  }
+}
+
 async function sendMessage() {
   const input = document.getElementById("chat-text");
   const text = input.value.trim();
@@ -146,7 +182,7 @@ async function sendMessage() {
   const placeholder = appendAmiMessage("…", true);
 
   try {
-    const res = await fetch("/api/chat", {
+    const res = await fetch("/api/chat/stream", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify(
@@ -154,11 +190,20 @@ async function sendMessage() {
       ),
     });
 
-    const data = await res.json();
-    let reply = data.reply || "";
+    const chatLog = document.getElementById("chat-log");
+    const textEl = placeholder.querySelector(".ami-text");
+    let reply = "";
 
+    await readEventStream(res, (event, data) => {
+      if (event === "error") throw new Error(data.message || "Stream failed");
+      if (data.delta) {
+        reply += data.delta;
+        textEl.textContent = reply;
+        chatLog.scrollTop = chatLog.scrollHeight;
+      }
+    });
 
-    placeholder.querySelector(".ami-text").textContent = reply;
+    placeholder.classList.remove("placeholder");
     loadTimeline();
 
   } catch (err) {
@@ -313,7 +358,7 @@ async function loadReflections() {
   try {
     const agent = getActiveAgent();
     const res = await fetch(
-      `/api/intelligence/${agent}/reports?type=weekly_reflection`
+      `/api/intelligence/${agent}/reports?type=weekly_reflection&limit=5`
     );
 
     const data = await res.json();
@@ -374,13 +419,35 @@ async function loadReflections() {
 
 
 
+// Report generation runs as a background job; poll until it settles.
+async function waitForJob(res, intervalMs = 1500, timeoutMs = 10 * 60 * 1000) {
+  const data = await res.json();
+  if (!data.job_id) return data;
+
+  const deadline = Date.now() + timeoutMs;
+  while (Date.now() < deadline) {
+    await new Promise(r => setTimeout(r, intervalMs));
+
+    const statusRes = await fetch(`/api/jobs/${data.job_id}`);
+    const job = await statusRes.json();
+    if (!statusRes.ok) throw new Error(job.error || "Job lookup failed");
+
+    if (job.status === "done") return job;
+    if (job.status === "failed") throw new Error(job.error || "Job failed");
+  }
+
+  throw new Error("Timed out waiting for job");
+}
+
+
 async function generateWeeklyReflection() {
   try {
     const agent = getActiveAgent();
-    await fetch(
+    const res = await fetch(
         `/api/intelligence/${agent}/weekly_reflection`,
         { method: "POST" }
     );
+    await waitForJob(res);
 
     // Reload reflections after generation
     loadReflections();
@@ -471,7 +538,7 @@ async function loadCategorySummary() {
 
   try {
     const res = await fetch(
-      `/api/intelligence/${agent}/reports?type=category_summary`
+      `/api/intelligence/${agent}/reports?type=category_summary&limit=1`
     );
     const data = await res.json();
 
@@ -543,10 +610,11 @@ async function regenerateCategorySummary() {
   btn.textContent = "Regenerating…";
 
   try {
-    await fetch(
+    const res = await fetch(
       `/api/intelligence/${agent}/category_summary`,
       { method: "POST" }
     );
+    await waitForJob(res);
 
     await loadCategorySummary(); // reload after regenerate
   } catch (err) {
@@ -0,0 +1,153 @@
+# sync/fake_sheets.py
+
+import re
+import threading
+
+_RANGE_RE = re.compile(r"^(?:'(?P<tab>[^']*)'!)?(?P<c1>[A-Z]+)(?P<r1>\d*)(?::(?P<c2>[A-Z]+)(?P<r2>\d*))?$")
+
+
+def _column_index(letters: str) -> int:
+    """
+    A → 0, Z → 25, AA → 26
+    """
+    n = 0
+    for ch in letters:
+        n = n * 26 + (ord(ch) - ord("A") + 1)
+    return n - 1
+
+
+def parse_range(a1: str):
+    """
+    "'tab'!A2:H5" → (tab, first_row, first_col, last_row, last_col);
+    rows are 1-based, None when open-ended ("A:Z", "A2:A").
+    """
+    m = _RANGE_RE.match(a1)
+    if not m:
+        raise ValueError(f"Unsupported range: {a1!r}")
+
+    c1 = _column_index(m["c1"])
+    c2 = _column_index(m["c2"]) if m["c2"] else c1
+    r1 = int(m["r1"]) if m["r1"] else None
+    if m["c2"]:
+        r2 = int(m["r2"]) if m["r2"] else None
+    else:
+        r2 = r1
+    return m["tab"], r1, c1, r2, c2
+
+
+class _Request:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self):
+        return self._fn()
+
+
+class FakeSheetsService:
+    """
+    In-memory stand-in for the Sheets v4 client, enough for
+    GoogleSheetsAdapter: values().get / batchGet / update / append / batchUpdate.
+
+    - tabs: {tab name: list of rows (lists of cells)}, row 1 = header
+    - calls: list of (method, range or None), one per executed request
+    """
+
+    def __init__(self, tabs: dict = None):
+        self.tabs = tabs if tabs is not None else {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    # client shape: service.spreadsheets().values().<method>(...)
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    @property
+    def request_count(self):
+        return len(self.calls)
+
+    def _grid(self, tab):
+        return self.tabs.setdefault(tab, [])
+
+    def _write(self, tab, row, col, values):
+        grid = self._grid(tab)
+        for i, row_values in enumerate(values):
+            r = row - 1 + i
+            while len(grid) <= r:
+                grid.append([])
+            cells = grid[r]
+            while len(cells) < col + len(row_values):
+                cells.append("")
+            cells[col:col + len(row_values)] = list(row_values)
+
+    # -------------------------------------------------
+    # API methods
+    # -------------------------------------------------
+
+    def get(self, spreadsheetId, range):
+        def run(record=True):
+            with self._lock:
+                if record:
+                    self.calls.append(("get", range))
+                tab, r1, c1, r2, c2 = parse_range(range)
+                grid = self._grid(tab)
+                first = (r1 or 1) - 1
+                last = len(grid) if r2 is None else min(r2, len(grid))
+
+                rows = [list(cells[c1:c2 + 1]) for cells in grid[first:last]]
+                # the API trims trailing empty cells and rows
+                for r in rows:
+                    while r and r[-1] == "":
+                        r.pop()
+                while rows and not rows[-1]:
+                    rows.pop()
+
+                return {"range": range, "values": rows} if rows else {"range": range}
+
+        return _Request(run)
+
+    def batchGet(self, spreadsheetId, ranges):
+        def run():
+            with self._lock:
+                self.calls.append(("batchGet", None))
+            return {"valueRanges": [self.get(spreadsheetId, r)._fn(record=False) for r in ranges]}
+
+        return _Request(run)
+
+    def update(self, spreadsheetId, range, valueInputOption, body):
+        def run():
+            with self._lock:
+                self.calls.append(("update", range))
+                tab, r1, c1, _, _ = parse_range(range)
+                self._write(tab, r1 or 1, c1, body["values"])
+                return {"updatedRows": len(body["values"])}
+
+        return _Request(run)
+
+    def append(self, spreadsheetId, range, valueInputOption, body, insertDataOption=None):
+        def run():
+            with self._lock:
+                self.calls.append(("append", range))
+                tab, _, c1, _, _ = parse_range(range)
+                first = len(self._grid(tab)) + 1
+                self._write(tab, first, c1, body["values"])
+                n = len(body["values"])
+                return {"updates": {
+                    "updatedRange": f"'{tab}'!A{first}:Z{first + n - 1}",
+                    "updatedRows": n,
+                }}
+
+        return _Request(run)
+
+    def batchUpdate(self, spreadsheetId, body):
+        def run():
+            with self._lock:
+                self.calls.append(("batchUpdate", None))
+                for item in body["data"]:
+                    tab, r1, c1, _, _ = parse_range(item["range"])
+                    self._write(tab, r1 or 1, c1, item["values"])
+                return {"totalUpdatedRows": sum(len(d["values"]) for d in body["data"])}
+
+        return _Request(run)
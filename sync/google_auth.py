@@ -1,6 +1,10 @@
 import json
+import logging
 import os
+import threading
+import time
 import webbrowser
+from datetime import datetime, timedelta
 from pathlib import Path
 from urllib.parse import urlencode
 
@@ -24,6 +28,11 @@ CLIENT_SECRET_PATH = ROOT_DIR / "secrets" / "google_oauth_client.json"
 
 REDIRECT_URI = "http://localhost:8765"  # local-only, manual flow
 
+# Refresh the access token this long before it expires
+REFRESH_MARGIN = timedelta(minutes=5)
+
+logger = logging.getLogger(__name__)
+
 
 # -----------------------------
 # Helpers
@@ -124,3 +133,81 @@ def get_credentials():
 
     save_token(creds)
     return creds
+
+
+# -----------------------------
+# Process-wide cached credentials
+# -----------------------------
+
+_creds = None
+_creds_lock = threading.Lock()
+_auth_request = None
+_refresher = None
+
+
+def _request():
+    # one pooled HTTP session for every token refresh
+    global _auth_request
+    if _auth_request is None:
+        _auth_request = Request(session=requests.Session())
+    return _auth_request
+
+
+def _needs_refresh(creds) -> bool:
+    if not creds.refresh_token:
+        return False
+    if creds.expiry is None:
+        return not creds.valid
+    # google-auth keeps expiry as naive UTC
+    return creds.expiry - datetime.utcnow() <= REFRESH_MARGIN
+
+
+def _refresh(creds):
+    creds.refresh(_request())
+    save_token(creds)
+
+
+def get_cached_credentials():
+    """
+    Credentials shared by all syncs in this process: the token file is
+    read once, and the token is refreshed ahead of expiry (normally by
+    the background refresher, so callers never wait on it).
+    """
+    global _creds
+    with _creds_lock:
+        if _creds is None:
+            _creds = get_credentials()
+        elif _needs_refresh(_creds):
+            _refresh(_creds)
+        return _creds
+
+
+def _refresh_loop(check_interval: float):
+    global _creds
+    while True:
+        try:
+            with _creds_lock:
+                # never start the interactive flow from a background thread
+                if _creds is None:
+                    _creds = load_token()
+                if _creds is not None and _needs_refresh(_creds):
+                    _refresh(_creds)
+                    logger.info("Google token refreshed, expires %s", _creds.expiry)
+        except Exception:
+            logger.exception("Background Google token refresh failed")
+
+        time.sleep(check_interval)
+
+
+def start_token_refresher(check_interval: float = 60):
+    """
+    Keep the stored token fresh in a daemon thread (no-op until a token
+    file exists; safe to call more than once).
+    """
+    global _refresher
+    if _refresher is not None:
+        return
+    _refresher = threading.Thread(
+        target=_refresh_loop, args=(check_interval,), name="google-token-refresher", daemon=True,
+    )
+    _refresher.start()
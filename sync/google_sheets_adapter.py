@@ -1,8 +1,23 @@
 # sync/google_sheets_adapter.py
 
-from googleapiclient.discovery import build
-from sync.google_auth import get_credentials
+import re
+import threading
 
+from sync.sync_state import get_row_index, save_row_index, sheets_target
+
+# Sheets API limits are per request payload (~10 MB) and per-minute quota;
+# these keep each request well under both
+MAX_UPDATE_RANGES = 500
+MAX_APPEND_ROWS = 1000
+MAX_CELLS_PER_REQUEST = 50000
+
+# uuid column rows read per request when (re)building the row index
+INDEX_PAGE_ROWS = 10000
+
+# Ranges per batchGet when checking a stored row index (GET URL length)
+INDEX_CHECK_RANGES = 200
+
+_UPDATED_RANGE_RE = re.compile(r"![A-Z]+(\d+)(?::[A-Z]+(\d+))?$")
 
 EXPECTED_COLUMNS = [
     "uuid",
@@ -16,48 +31,293 @@ EXPECTED_COLUMNS = [
 ]
 
 
+def _column_letter(n: int) -> str:
+    """
+    1 → A, 26 → Z, 27 → AA
+    """
+    letters = ""
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+_service = None  # (creds, service)
+_service_lock = threading.Lock()
+_local = threading.local()
+
+
+def _thread_http(creds):
+    """
+    Authorised httplib2 connection of the calling thread (httplib2 is
+    not thread-safe, so threads never share one).
+    """
+    import google_auth_httplib2
+    import httplib2
+
+    cached = getattr(_local, "http", None)
+    if cached is None or cached[0] is not creds:
+        _local.http = cached = (creds, google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http()))
+    return cached[1]
+
+
+def get_sheets_service():
+    """
+    Sheets client built once per process from the bundled discovery
+    document, rebuilt only when the process-wide credentials object
+    changes. Each request executes on the calling thread's own
+    authorised http (see _thread_http), so the client is shared safely
+    by request threads and sync worker pools alike.
+    """
+    # Imported here so the adapter also works with an injected service
+    # when the Google client libraries are not installed
+    from googleapiclient.discovery import build
+    from googleapiclient.http import HttpRequest
+    from sync.google_auth import get_cached_credentials
+
+    global _service
+    creds = get_cached_credentials()
+
+    with _service_lock:
+        if _service is None or _service[0] is not creds:
+            def request_builder(http, *args, **kwargs):
+                return HttpRequest(_thread_http(creds), *args, **kwargs)
+
+            service = build(
+                "sheets",
+                "v4",
+                http=_thread_http(creds),
+                requestBuilder=request_builder,
+                static_discovery=True,
+            )
+            _service = (creds, service)
+        return _service[1]
+
+
 class GoogleSheetsAdapter:
-    def __init__(self, spreadsheet_id: str, sheet_tab: str):
+    """
+    - service: Sheets API client; the cached get_sheets_service() when
+      omitted (tests pass sync.fake_sheets.FakeSheetsService)
+
+    Writes are queued with queue_update / queue_append and sent by
+    flush() as values.batchUpdate / multi-row append requests.
+    """
+
+    def __init__(self, spreadsheet_id: str, sheet_tab: str, service=None):
         self.spreadsheet_id = spreadsheet_id
         self.sheet_tab = sheet_tab
-        self.service = build(
-            "sheets", "v4", credentials=get_credentials()
-        )
+        self.service = service or get_sheets_service()
+
+        self._pending_updates = {}  # row_index -> values
+        self._pending_appends = []
+        self.requests = 0
+
+        # uuid -> row of rows appended by flush(), for the row index
+        self.appended = {}
 
     def fetch_existing_rows(self):
         """
         Returns dict: uuid -> row_index
+        Reads the uuid column in pages of INDEX_PAGE_ROWS rows.
         """
-        result = self.service.spreadsheets().values().get(
-            spreadsheetId=self.spreadsheet_id,
-            range=f"'{self.sheet_tab}'!A2:A"
-        ).execute()
-
-        rows = result.get("values", [])
         existing = {}
+        start = 2
+
+        while True:
+            end = start + INDEX_PAGE_ROWS - 1
+            result = self.service.spreadsheets().values().get(
+                spreadsheetId=self.spreadsheet_id,
+                range=f"'{self.sheet_tab}'!A{start}:A{end}"
+            ).execute()
+            self.requests += 1
+
+            rows = result.get("values", [])
+            for idx, row in enumerate(rows, start=start):
+                if row:
+                    existing[row[0]] = idx
 
-        for idx, row in enumerate(rows, start=2):
-            if row:
-                existing[row[0]] = idx
+            # trailing empty rows are trimmed, so a short page is the last one
+            if len(rows) < INDEX_PAGE_ROWS:
+                return existing
+            start = end + 1
+
+    # -------------------------------------------------
+    # Persistent row index
+    # -------------------------------------------------
+
+    def _index_matches_sheet(self, index: dict, last_row: int, rows) -> bool:
+        """
+        Check the stored index against the uuid column: the last indexed
+        row still holds its uuid, the row after it is empty (nothing was
+        appended by hand) and every row about to be rewritten still holds
+        the uuid the index says. Consecutive rows are read as one range.
+        """
+        by_row = {row: uuid for uuid, row in index.items()}
+        checks = sorted({last_row, last_row + 1, *rows} - {1})
+
+        runs = []
+        for row in checks:
+            if runs and row == runs[-1][1] + 1:
+                runs[-1][1] = row
+            else:
+                runs.append([row, row])
+
+        for i in range(0, len(runs), INDEX_CHECK_RANGES):
+            chunk = runs[i:i + INDEX_CHECK_RANGES]
+            result = self.service.spreadsheets().values().batchGet(
+                spreadsheetId=self.spreadsheet_id,
+                ranges=[f"'{self.sheet_tab}'!A{r1}:A{r2}" for r1, r2 in chunk],
+            ).execute()
+            self.requests += 1
 
-        return existing
+            for (r1, r2), value_range in zip(chunk, result.get("valueRanges", [])):
+                values = value_range.get("values", [])
+                for row in range(r1, r2 + 1):
+                    cells = values[row - r1] if row - r1 < len(values) else []
+                    if (cells[0] if cells else "") != by_row.get(row, ""):
+                        return False
+
+        return True
+
+    def load_row_index(self, uuids=()) -> dict:
+        """
+        uuid -> row from the local index (sync/sync_state.py), rebuilt
+        from the sheet when it went stale (rows inserted, deleted or
+        sorted by hand).
+
+        - uuids: rows the caller is about to rewrite; their rows are
+          checked so an update never lands on another entry's row
+        """
+        target = sheets_target(self.spreadsheet_id, self.sheet_tab)
+        stored = get_row_index(target)
+
+        if stored is not None:
+            index, last_row = stored
+            rows = [index[u] for u in uuids if u in index]
+            if self._index_matches_sheet(index, last_row, rows):
+                return index
+
+        index = self.fetch_existing_rows()
+        save_row_index(target, index, max(index.values(), default=1), replace=True)
+        return index
+
+    def save_appended_rows(self):
+        """
+        Add rows appended by flush() to the local row index.
+        """
+        if not self.appended:
+            return
+        target = sheets_target(self.spreadsheet_id, self.sheet_tab)
+        stored = get_row_index(target)
+        last_row = max(stored[1] if stored else 1, *self.appended.values())
+        save_row_index(target, self.appended, last_row)
+        self.appended = {}
 
     def update_row(self, row_index, values):
-        self.service.spreadsheets().values().update(
-            spreadsheetId=self.spreadsheet_id,
-            range=f"'{self.sheet_tab}'!A{row_index}:Z{row_index}",
-            valueInputOption="RAW",
-            body={"values": [values]}
-        ).execute()
+        self.queue_update(row_index, values)
+        self.flush()
 
     def append_row(self, values):
-        self.service.spreadsheets().values().append(
-            spreadsheetId=self.spreadsheet_id,
-            range=f"'{self.sheet_tab}'!A:Z",
-            valueInputOption="RAW",
-            insertDataOption="INSERT_ROWS",
-            body={"values": [values]}
-        ).execute()
+        self.queue_append(values)
+        self.flush()
+
+    # -------------------------------------------------
+    # Batched writes
+    # -------------------------------------------------
+
+    def queue_update(self, row_index, values):
+        self._pending_updates[row_index] = values
+
+    def queue_append(self, values):
+        self._pending_appends.append(values)
+
+    def _update_ranges(self):
+        """
+        Pending updates as A1 ranges; consecutive rows share one range.
+        """
+        ranges = []
+        start, block = None, []
+
+        for row_index in sorted(self._pending_updates):
+            values = self._pending_updates[row_index]
+            if block and row_index == start + len(block) and len(block) < MAX_APPEND_ROWS:
+                block.append(values)
+                continue
+            if block:
+                ranges.append((start, block))
+            start, block = row_index, [values]
+
+        if block:
+            ranges.append((start, block))
+
+        return [
+            {
+                "range": (
+                    f"'{self.sheet_tab}'!A{start}:"
+                    f"{_column_letter(max(len(v) for v in block))}{start + len(block) - 1}"
+                ),
+                "values": block,
+            }
+            for start, block in ranges
+        ]
+
+    @staticmethod
+    def _update_chunks(data):
+        # at most MAX_UPDATE_RANGES ranges / ~MAX_CELLS_PER_REQUEST cells each
+        chunk, cells = [], 0
+        for item in data:
+            n = sum(len(v) for v in item["values"])
+            if chunk and (len(chunk) >= MAX_UPDATE_RANGES or cells + n > MAX_CELLS_PER_REQUEST):
+                yield chunk
+                chunk, cells = [], 0
+            chunk.append(item)
+            cells += n
+        if chunk:
+            yield chunk
+
+    def flush(self):
+        """
+        Send queued writes:
+        - updates → values.batchUpdate, consecutive rows merged into one
+          range, MAX_UPDATE_RANGES ranges / MAX_CELLS_PER_REQUEST cells per request
+        - appends → values.append, MAX_APPEND_ROWS rows per request
+        Returns the number of API requests made.
+        """
+        sent = 0
+
+        for chunk in self._update_chunks(self._update_ranges()):
+            self.service.spreadsheets().values().batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={
+                    "valueInputOption": "RAW",
+                    "data": chunk,
+                },
+            ).execute()
+            sent += 1
+
+        for i in range(0, len(self._pending_appends), MAX_APPEND_ROWS):
+            chunk = self._pending_appends[i:i + MAX_APPEND_ROWS]
+            response = self.service.spreadsheets().values().append(
+                spreadsheetId=self.spreadsheet_id,
+                range=f"'{self.sheet_tab}'!A:Z",
+                valueInputOption="RAW",
+                insertDataOption="INSERT_ROWS",
+                body={"values": chunk}
+            ).execute()
+            sent += 1
+
+            # e.g. "'tab'!A101:H200" → rows 101..200 hold this chunk
+            m = _UPDATED_RANGE_RE.search((response or {}).get("updates", {}).get("updatedRange", ""))
+            if m:
+                first = int(m.group(1))
+                self.appended.update(
+                    (values[0], first + j) for j, values in enumerate(chunk) if values
+                )
+
+        self._pending_updates = {}
+        self._pending_appends = []
+        self.requests += sent
+        return sent
 
     def format_row(self, row: dict):
         values = []
@@ -92,6 +352,7 @@ class GoogleSheetsAdapter:
             spreadsheetId=self.spreadsheet_id,
             range=f"'{self.sheet_tab}'!A1:Z1"
         ).execute()
+        self.requests += 1
 
         rows = result.get("values", [])
         return rows[0] if rows else []
@@ -107,6 +368,7 @@ class GoogleSheetsAdapter:
                 valueInputOption="RAW",
                 body={"values": [EXPECTED_COLUMNS]}
             ).execute()
+            self.requests += 1
             return
 
         # Case 2: Header exists but differs → fix it
@@ -117,5 +379,6 @@ class GoogleSheetsAdapter:
                 valueInputOption="RAW",
                 body={"values": [EXPECTED_COLUMNS]}
             ).execute()
+            self.requests += 1
 
 
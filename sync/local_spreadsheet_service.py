@@ -1,22 +1,120 @@
 # sync/local_spreadsheet_service.py
 
 import csv
+import os
+import tempfile
 from pathlib import Path
 
-def sync_rows_to_csv(rows, output_path: str):
+# Fixed export schema; one line per entry version
+CSV_COLUMNS = [
+    "uuid",
+    "agent",
+    "type",
+    "subject",
+    "tags",
+    "text",
+    "created_at",
+    "updated_at",
+    "deleted",
+]
+
+
+def format_csv_row(row: dict):
+    values = []
+
+    for col in CSV_COLUMNS:
+        if col == "text":
+            value = "\n".join(row.get("content", []))
+        elif col == "tags":
+            value = ", ".join(str(t) for t in row.get("tags", []))
+        elif col == "deleted":
+            value = int(bool(row.get("deleted")))
+        else:
+            value = row.get(col)
+
+        values.append("" if value is None else value)
+
+    return values
+
+
+def _read_header(path: Path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), None)
+
+
+def write_rows_csv(rows, output_path: str):
+    """
+    Replace output_path with a CSV of rows (any iterable of entry dicts).
+
+    Rows are streamed to a temp file in the same directory, which is
+    then renamed over the target: readers see the old file or the new
+    one, never a partial export.
+    Returns the number of rows written.
+    """
     path = Path(output_path)
     path.parent.mkdir(parents=True, exist_ok=True)
 
-    if not rows:
-        return {"status": "ok", "rows_written": 0}
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    written = 0
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS)
+            for row in rows:
+                writer.writerow(format_csv_row(row))
+                written += 1
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+    return written
 
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-        writer.writeheader()
-        writer.writerows(rows)
+
+def append_rows_csv(rows, output_path: str):
+    """
+    Append rows to an existing export written with CSV_COLUMNS.
+
+    On failure the file is truncated back to its previous size, so an
+    interrupted append leaves no partial lines behind.
+    Returns the number of rows appended.
+    """
+    path = Path(output_path)
+    if _read_header(path) != CSV_COLUMNS:
+        raise ValueError(f"{path} does not use the export schema")
+
+    size = path.stat().st_size
+    written = 0
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        try:
+            writer = csv.writer(f)
+            for row in rows:
+                writer.writerow(format_csv_row(row))
+                written += 1
+            f.flush()
+            os.fsync(f.fileno())
+        except BaseException:
+            f.truncate(size)
+            raise
+
+    return written
+
+
+def can_append(output_path: str) -> bool:
+    """
+    True if output_path exists and was written with the current schema.
+    """
+    path = Path(output_path)
+    return path.exists() and _read_header(path) == CSV_COLUMNS
+
+
+def sync_rows_to_csv(rows, output_path: str):
+    written = write_rows_csv(rows, output_path)
 
     return {
         "status": "ok",
-        "rows_written": len(rows),
-        "path": str(path),
+        "rows_written": written,
+        "path": str(output_path),
     }
@@ -0,0 +1,109 @@
+# sync/runner.py
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from sync.sync_service import sync_agent_to_csv, sync_agent_to_sheets
+from sync.sync_state import csv_target, sheets_target
+
+logger = logging.getLogger(__name__)
+
+# Targets synced at once; syncs are I/O bound (Sheets API / disk)
+MAX_SYNC_WORKERS = 4
+
+_target_locks = {}
+_target_locks_guard = threading.Lock()
+
+
+def _target_lock(target: str) -> threading.Lock:
+    with _target_locks_guard:
+        return _target_locks.setdefault(target, threading.Lock())
+
+
+def sync_target_name(cfg: dict) -> str:
+    if "local_path" in cfg:
+        return csv_target(cfg["local_path"])
+    return sheets_target(cfg["spreadsheet_id"], cfg["sheet_tab"])
+
+
+def sync_one(agent: str, cfg: dict, *, full: bool = False, repair: bool = False, service=None):
+    """
+    Sync one agent to its SYNC_CONFIG target (Sheets tab or local CSV).
+    repair only applies to Sheets; a full CSV export already rewrites the file.
+
+    Syncs of the same target are serialized: two concurrent incremental
+    syncs would read the same watermark and append the same rows twice.
+    """
+    with _target_lock(sync_target_name(cfg)):
+        if "local_path" in cfg:
+            return sync_agent_to_csv(agent, cfg["local_path"], full=full or repair)
+
+        return sync_agent_to_sheets(
+            agent,
+            spreadsheet_id=cfg["spreadsheet_id"],
+            sheet_tab=cfg["sheet_tab"],
+            full=full,
+            repair=repair,
+            service=service,
+        )
+
+
+def run_syncs(
+    sync_config: dict,
+    agents=None,
+    *,
+    full: bool = False,
+    repair: bool = False,
+    max_workers: int = MAX_SYNC_WORKERS,
+    progress_fn=None,
+    service=None,
+):
+    """
+    Sync several agents in parallel, one task per target.
+
+    - sync_config: agent -> target config (app.SYNC_CONFIG)
+    - agents: subset to sync; None → every configured agent
+    - progress_fn(fraction, message) after each finished target
+    A failing target does not stop the others; its error is reported
+    in its own result.
+    """
+    agents = [a for a in (agents or sync_config) if a in sync_config]
+    results = []
+
+    if not agents:
+        return {"status": "ok", "targets": results}
+
+    def run(agent):
+        started = time.monotonic()
+        cfg = sync_config[agent]
+        item = {"agent": agent, "target": sync_target_name(cfg)}
+        try:
+            item["result"] = sync_one(agent, cfg, full=full, repair=repair, service=service)
+            item["status"] = "ok"
+        except Exception as e:
+            logger.exception("Sync of %s to %s failed", agent, item["target"])
+            item["status"] = "failed"
+            item["error"] = str(e)
+        item["seconds"] = round(time.monotonic() - started, 3)
+        return item
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(agents)))) as pool:
+        futures = [pool.submit(run, agent) for agent in agents]
+        for done, future in enumerate(as_completed(futures), start=1):
+            item = future.result()
+            results.append(item)
+            if progress_fn:
+                progress_fn(done / len(agents), f"{item['agent']}: {item['status']}")
+
+    results.sort(key=lambda r: agents.index(r["agent"]))
+    failed = sum(r["status"] == "failed" for r in results)
+    if not failed:
+        status = "ok"
+    elif failed < len(results):
+        status = "partial"
+    else:
+        status = "failed"
+
+    return {"status": status, "targets": results}
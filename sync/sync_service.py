@@ -1,6 +1,47 @@
 # sync/sync_service.py
 
-from sync.google_sheets_adapter import GoogleSheetsAdapter
+import json
+from collections import deque
+from datetime import datetime, timedelta
+
+from agents.common.storage import get_entries_changed_since, iter_entries_changed_since
+from sync.google_sheets_adapter import EXPECTED_COLUMNS, GoogleSheetsAdapter
+from sync.local_spreadsheet_service import (
+    append_rows_csv,
+    can_append,
+    format_csv_row,
+    write_rows_csv,
+)
+from sync.sync_state import (
+    csv_target,
+    get_row_hashes,
+    get_watermark,
+    row_hash,
+    set_row_hashes,
+    set_watermark,
+    sheets_target,
+)
+
+# updated_at moves on every save, even when nothing visible changed;
+# leave it out so re-saved but identical rows are still skipped
+_HASH_COLUMNS = [i for i, col in enumerate(EXPECTED_COLUMNS) if col != "updated_at"]
+
+
+# Writers stamp updated_at before their transaction commits, so a slow
+# commit can land just behind a watermark a sync already stored.
+# Incremental syncs re-read this many seconds before the watermark and
+# skip rows whose hash shows they were already written.
+WATERMARK_OVERLAP_SECONDS = 30
+
+
+def sheet_row_hash(values) -> str:
+    return row_hash([values[i] for i in _HASH_COLUMNS])
+
+
+def _overlap_since(since):
+    if since is None:
+        return None
+    return (datetime.fromisoformat(since) - timedelta(seconds=WATERMARK_OVERLAP_SECONDS)).isoformat()
 
 
 def sync_rows_to_sheets(
@@ -9,6 +50,8 @@ def sync_rows_to_sheets(
     rows: list[dict],
     *,
     uuid_field: str = "uuid",
+    service=None,
+    skip_unchanged: bool = True,
 ):
     """
     Generic one-way sync from local rows to Google Sheets.
@@ -17,28 +60,186 @@ def sync_rows_to_sheets(
     - sheet_tab: sheet/tab name (e.g. 'observations', 'workbench_notes')
     - rows: list of dicts containing uuid + fields
     - uuid_field: name of UUID field in row dict
+    - service: Sheets API client override (tests / fake service)
+    - skip_unchanged: rows already in the sheet whose formatted values
+      (all but updated_at) hash the same as at their last sync are not
+      rewritten; False rewrites every row (repairs hand edits)
+
+    Writes are batched: one batchUpdate per MAX_UPDATE_RANGES changed
+    ranges and one append per MAX_APPEND_ROWS new rows.
     """
 
-    adapter = GoogleSheetsAdapter(spreadsheet_id, sheet_tab)
-    adapter.ensure_header()
+    adapter = GoogleSheetsAdapter(spreadsheet_id, sheet_tab, service=service)
 
-    existing = adapter.fetch_existing_rows()
-    updated = 0
-    inserted = 0
+    target = sheets_target(spreadsheet_id, sheet_tab)
+    synced = get_row_hashes(target, (r[uuid_field] for r in rows)) if skip_unchanged else {}
 
+    planned = []
     for row in rows:
-        row_uuid = row[uuid_field]
         values = adapter.format_row(row)
+        planned.append((row[uuid_field], values, sheet_row_hash(values)))
+
+    # nothing changed since the last sync (e.g. only the watermark
+    # overlap was re-read): no API calls at all
+    if skip_unchanged and all(synced.get(u) == h for u, _, h in planned):
+        return {"inserted": 0, "updated": 0, "skipped": len(rows), "total": len(rows), "api_requests": 0}
 
+    adapter.ensure_header()
+
+    # rows that will be written if present are checked against the sheet first
+    existing = adapter.load_row_index(u for u, _, h in planned if synced.get(u) != h)
+
+    updated = 0
+    inserted = 0
+    skipped = 0
+    written = {}
+
+    for row_uuid, values, h in planned:
         if row_uuid in existing:
-            adapter.update_row(existing[row_uuid], values)
+            if synced.get(row_uuid) == h:
+                skipped += 1
+                continue
+            adapter.queue_update(existing[row_uuid], values)
             updated += 1
         else:
-            adapter.append_row(values)
+            adapter.queue_append(values)
             inserted += 1
 
+        written[row_uuid] = h
+
+    adapter.flush()
+    adapter.save_appended_rows()
+    set_row_hashes(target, written)
+
     return {
         "inserted": inserted,
         "updated": updated,
+        "skipped": skipped,
         "total": len(rows),
+        "api_requests": adapter.requests,
+    }
+
+
+def sync_agent_to_sheets(
+    agent: str,
+    spreadsheet_id: str,
+    sheet_tab: str,
+    *,
+    full: bool = False,
+    repair: bool = False,
+    service=None,
+):
+    """
+    Incremental sync of one agent's entries to a sheet tab.
+
+    - only entries created / updated since the last successful sync to
+      this tab (watermark in sync/sync_state.py) are pushed
+    - full=True ignores the watermark; rows whose values did not change
+      since their last sync are still skipped
+    - repair=True is a full sync that rewrites every row, undoing edits
+      made by hand in the sheet
+    The watermark only advances after the sheet write succeeded.
+    """
+    target = sheets_target(spreadsheet_id, sheet_tab)
+    since = None if full or repair else get_watermark(agent, target)
+
+    changes = get_entries_changed_since(agent, _overlap_since(since))
+    rows = [r for r in changes if not r["deleted"]]
+
+    if rows:
+        result = sync_rows_to_sheets(
+            spreadsheet_id, sheet_tab, rows, service=service, skip_unchanged=not repair,
+        )
+    else:
+        result = {"inserted": 0, "updated": 0, "skipped": 0, "total": 0, "api_requests": 0}
+
+    if changes:
+        # the overlap alone must not move the watermark back
+        watermark = max(since or "", changes[-1]["updated_at"])
+        set_watermark(agent, target, watermark, json.dumps(result))
+
+    mode = "repair" if repair else "full" if since is None else "incremental"
+    return {**result, "mode": mode, "since": since}
+
+
+def _skip_exported(rows, target, since):
+    """
+    Drop (row, hash) pairs of the overlap window (updated_at <= since)
+    whose line is already in the export.
+    """
+    overlap = []
+    for row, h in rows:
+        if row["updated_at"] <= since:
+            overlap.append((row, h))
+            continue
+        if overlap:
+            yield from _unexported(overlap, target)
+            overlap = []
+        yield row, h
+    yield from _unexported(overlap, target)
+
+
+def _unexported(pairs, target):
+    if not pairs:
+        return []
+    exported = get_row_hashes(target, (row["uuid"] for row, _ in pairs))
+    return [(row, h) for row, h in pairs if exported.get(row["uuid"]) != h]
+
+
+def sync_agent_to_csv(agent: str, output_path: str, *, full: bool = False):
+    """
+    Export one agent's entries to a local CSV, streaming from the store.
+
+    - first run, full=True, or a file missing / on an older schema:
+      every live entry is rewritten atomically (temp file + rename)
+    - otherwise only changes since the last export are appended, one
+      line per change (edits and deletions included; last line per
+      uuid wins)
+    The watermark only advances after the file write succeeded.
+
+    Hashes of the lines written in the last WATERMARK_OVERLAP_SECONDS
+    are kept so the next run's overlap does not append them again.
+    """
+    target = csv_target(output_path)
+    since = None if full else get_watermark(agent, target)
+    if since is not None and not can_append(output_path):
+        since = None
+
+    last = {"updated_at": None}
+    recent = deque()  # (updated_at, uuid, hash) of the newest lines
+
+    def hashed():
+        for row in iter_entries_changed_since(agent, _overlap_since(since)):
+            last["updated_at"] = row["updated_at"]
+            if since is None and row["deleted"]:
+                continue
+            yield row, row_hash(format_csv_row(row))
+
+    def changes():
+        rows = hashed() if since is None else _skip_exported(hashed(), target, since)
+        for row, h in rows:
+            recent.append((row["updated_at"], row["uuid"], h))
+            cutoff = _overlap_since(row["updated_at"])
+            while recent[0][0] <= cutoff:
+                recent.popleft()
+            yield row
+
+    if since is None:
+        written = write_rows_csv(changes(), output_path)
+    else:
+        written = append_rows_csv(changes(), output_path)
+
+    result = {
+        "status": "ok",
+        "rows_written": written,
+        "path": str(output_path),
+        "mode": "full" if since is None else "incremental",
+        "since": since,
     }
+
+    if last["updated_at"]:
+        set_row_hashes(target, {u: h for _, u, h in recent})
+        watermark = max(since or "", last["updated_at"])
+        set_watermark(agent, target, watermark, json.dumps({"rows_written": written}))
+
+    return result
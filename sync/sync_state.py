@@ -0,0 +1,213 @@
+# sync/sync_state.py
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+DB_PATH = Path("data/sync_state.db")
+DB_PATH.parent.mkdir(exist_ok=True)
+
+
+def get_conn():
+    conn = sqlite3.connect(DB_PATH, timeout=10)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_db():
+    conn = get_conn()
+    cur = conn.cursor()
+
+    # one row per (agent, target); target e.g. "sheets:<id>:<tab>"
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS sync_state (
+        agent TEXT,
+        target TEXT,
+        watermark TEXT,
+        last_synced_at TEXT,
+        last_result TEXT,
+        PRIMARY KEY (agent, target)
+    )
+    """)
+
+    # hash of the values last written for each row (skip unchanged rows)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS row_hashes (
+        target TEXT,
+        uuid TEXT,
+        hash TEXT,
+        PRIMARY KEY (target, uuid)
+    )
+    """)
+
+    # uuid -> sheet row, so syncs don't re-read the whole uuid column
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS sheet_row_index (
+        target TEXT,
+        uuid TEXT,
+        row INTEGER,
+        PRIMARY KEY (target, uuid)
+    )
+    """)
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS sheet_index_meta (
+        target TEXT PRIMARY KEY,
+        last_row INTEGER,
+        rebuilt_at TEXT
+    )
+    """)
+
+    conn.commit()
+    conn.close()
+
+
+def sheets_target(spreadsheet_id: str, sheet_tab: str) -> str:
+    return f"sheets:{spreadsheet_id}:{sheet_tab}"
+
+
+def csv_target(path: str) -> str:
+    return f"csv:{path}"
+
+
+def get_watermark(agent: str, target: str):
+    """
+    updated_at of the newest entry pushed by the last successful sync
+    (None → never synced, do a full sync).
+    """
+    conn = get_conn()
+    row = conn.execute(
+        "SELECT watermark FROM sync_state WHERE agent = ? AND target = ?",
+        (agent, target),
+    ).fetchone()
+    conn.close()
+    return row["watermark"] if row else None
+
+
+def set_watermark(agent: str, target: str, watermark: str, last_result: str = None):
+    conn = get_conn()
+    conn.execute("""
+        INSERT INTO sync_state (agent, target, watermark, last_synced_at, last_result)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(agent, target) DO UPDATE SET
+            watermark = excluded.watermark,
+            last_synced_at = excluded.last_synced_at,
+            last_result = excluded.last_result
+    """, (agent, target, watermark, datetime.utcnow().isoformat(), last_result))
+    conn.commit()
+    conn.close()
+
+
+def get_sync_state(agent: str = None):
+    conn = get_conn()
+    query = "SELECT * FROM sync_state"
+    params = []
+    if agent:
+        query += " WHERE agent = ?"
+        params.append(agent)
+    rows = conn.execute(query, params).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+
+# -------------------------------------------------
+# Row hashes
+# -------------------------------------------------
+
+# SQLite's default max host parameters is 999
+_IN_CHUNK = 500
+
+
+def row_hash(values) -> str:
+    return hashlib.sha1(
+        json.dumps(values, ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def get_row_hashes(target: str, uuids) -> dict:
+    """
+    uuid -> hash of the values last synced to target.
+    """
+    uuids = list(uuids)
+    hashes = {}
+
+    conn = get_conn()
+    for i in range(0, len(uuids), _IN_CHUNK):
+        chunk = uuids[i:i + _IN_CHUNK]
+        rows = conn.execute(f"""
+            SELECT uuid, hash FROM row_hashes
+            WHERE target = ? AND uuid IN ({",".join("?" * len(chunk))})
+        """, (target, *chunk)).fetchall()
+        hashes.update((r["uuid"], r["hash"]) for r in rows)
+    conn.close()
+
+    return hashes
+
+
+def set_row_hashes(target: str, hashes: dict):
+    if not hashes:
+        return
+
+    conn = get_conn()
+    conn.executemany("""
+        INSERT INTO row_hashes (target, uuid, hash) VALUES (?, ?, ?)
+        ON CONFLICT(target, uuid) DO UPDATE SET hash = excluded.hash
+    """, [(target, u, h) for u, h in hashes.items()])
+    conn.commit()
+    conn.close()
+
+
+# -------------------------------------------------
+# Sheet row index
+# -------------------------------------------------
+
+def get_row_index(target: str):
+    """
+    Returns (uuid -> row, last_row) or None if the target was never indexed.
+    """
+    conn = get_conn()
+    meta = conn.execute(
+        "SELECT last_row FROM sheet_index_meta WHERE target = ?", (target,)
+    ).fetchone()
+    if meta is None:
+        conn.close()
+        return None
+
+    rows = conn.execute(
+        "SELECT uuid, row FROM sheet_row_index WHERE target = ?", (target,)
+    ).fetchall()
+    conn.close()
+
+    return {r["uuid"]: r["row"] for r in rows}, meta["last_row"]
+
+
+def save_row_index(target: str, rows: dict, last_row: int, *, replace: bool = False):
+    """
+    Store uuid -> row entries for target.
+    - replace=True: the index was rebuilt from the sheet; drop old entries
+    """
+    conn = get_conn()
+    if replace:
+        conn.execute("DELETE FROM sheet_row_index WHERE target = ?", (target,))
+
+    conn.executemany("""
+        INSERT INTO sheet_row_index (target, uuid, row) VALUES (?, ?, ?)
+        ON CONFLICT(target, uuid) DO UPDATE SET row = excluded.row
+    """, [(target, u, r) for u, r in rows.items()])
+
+    conn.execute("""
+        INSERT INTO sheet_index_meta (target, last_row, rebuilt_at) VALUES (?, ?, ?)
+        ON CONFLICT(target) DO UPDATE SET
+            last_row = excluded.last_row,
+            rebuilt_at = COALESCE(?, sheet_index_meta.rebuilt_at)
+    """, (
+        target,
+        last_row,
+        datetime.utcnow().isoformat(),
+        datetime.utcnow().isoformat() if replace else None,
+    ))
+
+    conn.commit()
+    conn.close()